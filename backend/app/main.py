@@ -5,7 +5,9 @@ AI-powered manga localization services
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 # Configure logging
@@ -18,10 +20,35 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting MangaHub AI Backend...")
     logger.info("📦 Loading OCR models...")
-    # Models will be loaded lazily on first request
+    from app.services.model_warmup import EAGER_LOAD_MODELS, mark_warmup_pending, warmup_models
+    from app.services.cotrans_health import get_cotrans_health
+    from app.services.http_client import close_http_client
+    from app.services.local_translation import get_local_translation_engines
+    from app.services.worker_pool import get_worker_pool, shutdown_worker_pool
+    
+    # In OCR_WORKERS > 0 mode each worker process preloads and warms the models itself
+    pool = get_worker_pool()
+    pool.start_async()
+    
+    if EAGER_LOAD_MODELS and pool.workers == 0:
+        # Warm in the background; /ready reports 503 until done
+        mark_warmup_pending()
+        app.state.warmup_task = asyncio.create_task(asyncio.to_thread(warmup_models))
+    elif not EAGER_LOAD_MODELS:
+        # Models will be loaded lazily on first request
+        logger.info("Lazy model loading (set EAGER_LOAD_MODELS=true to warm up at startup)")
+    
+    # Background Cotrans probe: jobs route on its cached state instead of waiting on a dead remote
+    get_cotrans_health().start()
+    # Unload local translation models that went idle, even when no request comes in
+    get_local_translation_engines().start()
     yield
     # Shutdown
     logger.info("👋 Shutting down MangaHub AI Backend...")
+    await get_cotrans_health().stop()
+    await get_local_translation_engines().stop()
+    shutdown_worker_pool()
+    await close_http_client()
 
 # Create FastAPI app
 app = FastAPI(
@@ -65,6 +92,29 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness for load balancers: models loaded and warmed (503 until then)"""
+    from app.services.model_warmup import EAGER_LOAD_MODELS, get_model_state, models_ready
+    from app.services.worker_pool import get_worker_pool
+    
+    pool = get_worker_pool()
+    models = get_model_state()
+    
+    if pool.workers > 0:
+        ready = pool.workers_ready() and all(models_ready(state) for state in pool.worker_state.values())
+    else:
+        ready = models_ready(models) or not EAGER_LOAD_MODELS
+    
+    body = {
+        "ready": ready,
+        "eager_load": EAGER_LOAD_MODELS,
+        "worker_mode": pool.mode,
+        "models": models,
+        "workers": {str(pid): state for pid, state in pool.worker_state.items()},
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
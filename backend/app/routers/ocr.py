@@ -3,24 +3,37 @@ OCR Router - Cotrans API + Advanced Local Pipeline
 Detect, OCR, and surgically inpaint text from manga pages
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, BackgroundTasks, Request, Query
+from fastapi.responses import Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from typing import List, Optional
-import numpy as np
-import cv2
 import time
 import uuid
 import logging
-import base64
+import json
+import os
+import threading
 
 import asyncio
 
+from app.services.image_store import DEFAULT_QUALITY, FORMATS, get_image_store, make_data_url, variant_name
+from app.services.job_events import get_event_broker
+from app.services.job_store import get_job_store
+
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/ocr", tags=["OCR"])
 
-# --- Job Store (In-Memory) ---
-# Format: { "job_id": { "status": "pending|processing|completed|failed", "progress": 0, "message": "", "result": None, "error": None } }
-ocr_jobs = {}
+# --- Job Store (memory or SQLite, see app/services/job_store.py) ---
+# Record: { "job_id", "status": "pending|processing|completed|failed", "progress", "message", "result": dict|None, "error" }
+job_store = get_job_store()
+
+# Upper bound on pages per /chapter upload (all pages are held in memory while the job runs)
+CHAPTER_MAX_PAGES = int(os.getenv("CHAPTER_MAX_PAGES", "200"))
+
+# Hedged mode: start the local pipeline if Cotrans has no good result after this many seconds
+OCR_HEDGE = os.getenv("OCR_HEDGE", "false").lower() == "true"
+OCR_HEDGE_DELAY_SECONDS = float(os.getenv("OCR_HEDGE_DELAY_SECONDS", "8"))
 
 class BoundingBox(BaseModel):
     x: int
@@ -44,7 +57,8 @@ class OCRResponse(BaseModel):
     processing_time_ms: float
     engine: str = "unknown"
     message: Optional[str] = None
-    cleaned_image: Optional[str] = None  # Base64 string of inpainted image
+    cleaned_image: Optional[str] = None  # Inline image (Cotrans URL, or data URL with inline_image=true)
+    cleaned_image_url: Optional[str] = None  # Binary endpoint for the inpainted image
 
 
 class JobStatusResponse(BaseModel):
@@ -56,15 +70,44 @@ class JobStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
+class ChapterPage(BaseModel):
+    page: int
+    stage: str = "queued"  # queued, decode, detect, inpaint, ocr, encode, done, failed
+    progress: int = 0
+    result: Optional[OCRResponse] = None
+    error: Optional[str] = None
+
+
+class ChapterStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    progress: int
+    message: str
+    pages: List[ChapterPage] = []
+    error: Optional[str] = None
+
+
 async def process_with_cotrans(contents: bytes, language: str, target_lang: str = "vie") -> dict:
-    """Process image with Cotrans cloud API"""
+    """Process image with Cotrans cloud API (outcome and latency feed the Cotrans circuit breaker)"""
+    from app.services.cotrans_health import get_cotrans_health
     from app.services.cotrans_service import process_manga_with_cotrans
     
-    result = await process_manga_with_cotrans(
-        contents,
-        source_lang=language,
-        target_lang=target_lang
-    )
+    breaker = get_cotrans_health().breaker
+    start = time.monotonic()
+    try:
+        result = await process_manga_with_cotrans(
+            contents,
+            source_lang=language,
+            target_lang=target_lang
+        )
+    except asyncio.CancelledError:
+        # Lost a hedge race or the job was cancelled: not a Cotrans failure
+        breaker.release()
+        raise
+    except Exception as e:
+        breaker.record(False, time.monotonic() - start, str(e))
+        raise
+    breaker.record(bool(result.get("success")), time.monotonic() - start, result.get("error"))
     
     if not result.get("success"):
         raise Exception(result.get("error", "Cotrans failed"))
@@ -85,148 +128,181 @@ async def process_with_cotrans(contents: bytes, language: str, target_lang: str
     }
 
 
-def process_with_local_pipeline(contents: bytes) -> dict:
-    """
-    Process with Advanced Local Pipeline:
-    Sliding Window Detection + Surgical Inpainting + MangaOCR
-    """
+IMAGES_PATH = "/api/ocr/images/"
+
+
+def local_result_to_response(result: dict) -> dict:
+    """Convert the plain output of run_local_pipeline into API models (cleaned image goes to the image store)"""
+    image_id = get_image_store().put(result["cleaned_png"])
+    return {
+        "regions": [
+            TextRegion(
+                id=r['id'],
+                text=r['text'],
+                confidence=r['confidence'],
+                bounding_box=BoundingBox(**r['bounding_box'])
+            )
+            for r in result["regions"]
+        ],
+        "cleaned_image_url": f"{IMAGES_PATH}{image_id}"
+    }
+
+
+def pipeline_cache_key(contents: bytes, language: str, target_language: str, use_cotrans: bool) -> str:
+    """Result cache key: image content + every parameter that changes the output"""
     from app.services.image_processor import get_manga_processor
-    from app.services.manga_ocr_service import recognize_manga_text, is_valid_japanese_text
-    from PIL import Image
-    import io
-    
-    processor = get_manga_processor()
-    
-    # 1. Detect & Clean (Inpaint)
-    # This returns regions (boxes) and the surgically cleaned image (numpy)
-    region_dicts, cleaned_img_cv = processor.process(contents)
-    
-    # 2. Convert Cleaned Image to Base64
-    _, buffer = cv2.imencode('.png', cleaned_img_cv)
-    cleaned_image_b64 = base64.b64encode(buffer).decode('utf-8')
+    from app.services.manga_ocr_engine import get_profile_from_env
+    from app.services.result_cache import OCRResultCache
     
-    # 3. Perform OCR on Original Image Crops
-    # Reuse the logic of cropping from original image for best OCR quality
-    # (OCR on cleaned image would be empty!)
-    original_pil = Image.open(io.BytesIO(contents)).convert('RGB')
-    
-    final_regions = []
-    
-    for r in region_dicts:
-        bbox = r['bounding_box']
-        x, y, w, h = bbox['x'], bbox['y'], bbox['width'], bbox['height']
-        
-        # Crop from original
-        crop = original_pil.crop((x, y, x + w, y + h))
-        
-        try:
-            # Recognize Text
-            text = recognize_manga_text(crop)
-            
-            # Simple validation
-            if text:
-                final_regions.append(TextRegion(
-                    id=r['id'],
-                    text=text,
-                    confidence=90.0,
-                    bounding_box=BoundingBox(x=x, y=y, width=w, height=h)
-                ))
-        except Exception as e:
-            logger.warning(f"OCR failed for region: {e}")
-            
+    return OCRResultCache.make_key(contents, {
+        "language": language,
+        "target_language": target_language,
+        "use_cotrans": use_cotrans,
+        "detector": get_manga_processor().cache_signature(),
+        "ocr_profile": get_profile_from_env(),
+    })
+
+
+def stored_image_id(result: dict) -> Optional[str]:
+    url = result.get("cleaned_image_url") or ""
+    return url[len(IMAGES_PATH):] if url.startswith(IMAGES_PATH) else None
+
+
+def cached_result_usable(result: dict) -> bool:
+    """A cached result is only usable while its cleaned image is still in the image store"""
+    image_id = stored_image_id(result)
+    return image_id is None or image_id in get_image_store()
+
+
+def job_status_response(job: dict, inline_image: bool = False) -> JobStatusResponse:
+    result = job.get("result")
+    if result and inline_image and not result.get("cleaned_image"):
+        # Compatibility for clients that still expect the image inside the JSON
+        image_id = stored_image_id(result)
+        png = get_image_store().get(image_id) if image_id else None
+        if png is not None:
+            result = {**result, "cleaned_image": make_data_url("image/png", png)}
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        progress=job["progress"],
+        message=job["message"],
+        # Chapter jobs keep per-page results, see /chapter/{job_id}
+        result=OCRResponse(**result) if result and "pages" not in result else None,
+        error=job.get("error")
+    )
+
+
+def chapter_status_response(job: dict) -> ChapterStatusResponse:
+    result = job.get("result") or {}
+    return ChapterStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        progress=job["progress"],
+        message=job["message"],
+        pages=[ChapterPage(**page) for page in result.get("pages", [])],
+        error=job.get("error")
+    )
+
+
+def completed_event_data(result: dict) -> dict:
+    """Final stream event: the result with cleaned_image_url but without any inline image"""
     return {
-        "regions": final_regions,
-        "cleaned_image": f"data:image/png;base64,{cleaned_image_b64}"
+        "status": "completed",
+        "result": {k: v for k, v in result.items() if k != "cleaned_image"},
     }
 
-async def run_ocr_job(job_id: str, contents: bytes, language: str, target_language: str, use_cotrans: bool):
+
+async def run_ocr_job(job_id: str, contents: bytes, language: str, target_language: str, use_cotrans: bool, cache_key: Optional[str] = None):
     """Background task runner"""
     print(f"👉 [Job] Starting OCR job {job_id}")
     try:
-        ocr_jobs[job_id]["status"] = "processing"
-        ocr_jobs[job_id]["progress"] = 5
-        ocr_jobs[job_id]["message"] = "Đang khởi tạo..."
+        events = get_event_broker()
+        job_store.update(job_id, status="processing", progress=5, message="Đang khởi tạo...")
+        events.publish(job_id, "progress", {"progress": 5, "message": "Đang khởi tạo..."})
         
         start_time = time.time()
-        regions = []
-        cleaned_image = None
-        engine_used = "none"
+        # Set once an engine's result is chosen: a hedge loser still running in a worker stops reporting
+        settled = threading.Event()
 
         # Define progress callback for local pipeline
         def update_progress(pct: int, msg: str):
+            if settled.is_set():
+                return
             print(f"👉 [Progress] {pct}% - {msg}")
-            ocr_jobs[job_id]["progress"] = pct
-            ocr_jobs[job_id]["message"] = msg
-
-        # Try Cotrans API first
-        if use_cotrans:
-            try:
-                print("👉 [Job] Trying Cotrans API...")
-                ocr_jobs[job_id]["message"] = "Đang gửi yêu cầu Cotrans..."
-                # Cotrans doesn't support granular progress, jump to 50
-                ocr_jobs[job_id]["progress"] = 20
-                
-                result = await process_with_cotrans(contents, language, target_language)
-                regions = result["regions"]
-                cleaned_image = result["cleaned_image"]
-                print(f"👉 [Job] Cotrans returned {len(regions)} regions")
-                
-                if regions:
-                    engine_used = "cotrans"
-                else:
-                    print("👉 [Job] Cotrans found no regions, triggering fallback...")
-                    
-            except Exception as e:
-                print(f"❌ [Job] Cotrans failed: {e}")
-
-        # Fallback to Local Pipeline
-        if not regions:
-            try:
-                print("👉 [Job] Running Local Pipeline...")
-                # Local pipeline uses the callback
-                from app.services.image_processor import get_manga_processor
-                processor = get_manga_processor()
-                
-                # 1. Detect & Clean (with progress updates 10-90%)
-                region_dicts, cleaned_img_cv = processor.process(contents, update_progress)
-                
-                # 2. Finalize
-                update_progress(90, "Đang mã hóa ảnh kết quả...")
-                _, buffer = cv2.imencode('.png', cleaned_img_cv)
-                cleaned_image_b64 = base64.b64encode(buffer).decode('utf-8')
-                
-                # 3. OCR on Original Crops
-                update_progress(95, "Đang OCR từng vùng...")
-                from app.services.manga_ocr_service import recognize_manga_text
-                from PIL import Image
-                import io
-                
-                original_pil = Image.open(io.BytesIO(contents)).convert('RGB')
-                final_regions = []
-                
-                for r in region_dicts:
-                    bbox = r['bounding_box']
-                    x, y, w, h = bbox['x'], bbox['y'], bbox['width'], bbox['height']
-                    crop = original_pil.crop((x, y, x + w, y + h))
-                    try:
-                        text = recognize_manga_text(crop)
-                        if text:
-                            final_regions.append(TextRegion(
-                                id=r['id'],
-                                text=text,
-                                confidence=90.0,
-                                bounding_box=r['bounding_box']
-                            ))
-                    except: pass
-                
-                regions = final_regions
-                cleaned_image = f"data:image/png;base64,{cleaned_image_b64}"
-                engine_used = "local_advanced"
-                
-            except Exception as e:
-                logger.error(f"Local pipeline failed: {e}")
-                if engine_used == "none":
+            job_store.update(job_id, progress=pct, message=msg)
+            events.publish(job_id, "progress", {"progress": pct, "message": msg})
+
+        # Partial results (detected regions, OCR text) for streaming subscribers
+        def publish_partial(event: str, data: dict):
+            if not settled.is_set():
+                events.publish(job_id, event, data)
+
+        async def run_cotrans() -> dict:
+            print("👉 [Job] Trying Cotrans API...")
+            # Cotrans doesn't support granular progress, jump to 20
+            update_progress(20, "Đang gửi yêu cầu Cotrans...")
+            
+            result = await process_with_cotrans(contents, language, target_language)
+            print(f"👉 [Job] Cotrans returned {len(result['regions'])} regions")
+            return {"regions": result["regions"], "cleaned_image": result["cleaned_image"], "cleaned_image_url": None}
+
+        async def run_local() -> dict:
+            print("👉 [Job] Running Local Pipeline...")
+            # CPU-bound work runs in the worker pool; this coroutine only awaits it
+            from app.services.local_pipeline import run_local_pipeline
+            from app.services.worker_pool import get_worker_pool
+            
+            result = await get_worker_pool().run(
+                run_local_pipeline, contents, on_progress=update_progress, on_event=publish_partial
+            )
+            local = local_result_to_response(result)
+            return {"regions": local["regions"], "cleaned_image": None, "cleaned_image_url": local["cleaned_image_url"]}
+
+        # Try Cotrans API first, unless the breaker / health probe says it's down
+        from app.services.cotrans_health import get_cotrans_health
+        try_cotrans = use_cotrans and get_cotrans_health().should_try()
+        if use_cotrans and not try_cotrans:
+            print("👉 [Job] Cotrans circuit open, going straight to the local pipeline")
+
+        if try_cotrans and OCR_HEDGE:
+            # Hedged: local starts if Cotrans has no good result after OCR_HEDGE_DELAY_SECONDS, first good one wins
+            from app.services.hedging import get_hedge_stats, run_hedged
+            
+            engine_used, output, hedged = await run_hedged(
+                ("cotrans", run_cotrans),
+                ("local_advanced", run_local),
+                OCR_HEDGE_DELAY_SECONDS,
+                is_good=lambda out: bool(out["regions"]),
+            )
+            settled.set()
+            get_hedge_stats().record(engine_used, (time.time() - start_time) * 1000, hedged)
+            print(f"👉 [Job] Hedge won by {engine_used}{' (backup started)' if hedged else ''}")
+        else:
+            output = None
+            if try_cotrans:
+                try:
+                    output = await run_cotrans()
+                    if not output["regions"]:
+                        print("👉 [Job] Cotrans found no regions, triggering fallback...")
+                except Exception as e:
+                    print(f"❌ [Job] Cotrans failed: {e}")
+
+            if output and output["regions"]:
+                engine_used = "cotrans"
+            else:
+                # Fallback to Local Pipeline
+                try:
+                    output = await run_local()
+                    engine_used = "local_advanced"
+                except Exception as e:
+                    logger.error(f"Local pipeline failed: {e}")
                     raise e
+            settled.set()
+
+        regions = output["regions"]
+        cleaned_image = output["cleaned_image"]
+        cleaned_image_url = output["cleaned_image_url"]
 
         # Completion
         processing_time = (time.time() - start_time) * 1000
@@ -237,21 +313,113 @@ async def run_ocr_job(job_id: str, contents: bytes, language: str, target_langua
             processing_time_ms=processing_time,
             engine=engine_used,
             message=f"{len(regions)} regions detected",
-            cleaned_image=cleaned_image
+            cleaned_image=cleaned_image,
+            cleaned_image_url=cleaned_image_url
         )
         
-        ocr_jobs[job_id]["result"] = response
-        ocr_jobs[job_id]["status"] = "completed"
-        ocr_jobs[job_id]["progress"] = 100
-        ocr_jobs[job_id]["message"] = "Hoàn tất!"
+        result = jsonable_encoder(response)
+        job_store.update(job_id, result=result, status="completed", progress=100, message="Hoàn tất!")
+        events.publish(job_id, "completed", completed_event_data(result))
+        
+        if cache_key and regions:
+            from app.services.result_cache import get_result_cache
+            # Cached under the engine that produced it: a local fallback must not answer later Cotrans requests
+            if use_cotrans and engine_used != "cotrans":
+                get_result_cache().put(pipeline_cache_key(contents, language, target_language, False), result)
+            else:
+                get_result_cache().put(cache_key, result)
         
     except Exception as e:
         logger.error(f"Job failed: {e}")
-        ocr_jobs[job_id]["status"] = "failed"
-        ocr_jobs[job_id]["error"] = str(e)
+        job_store.update(job_id, status="failed", error=str(e))
+        get_event_broker().publish(job_id, "failed", {"error": str(e)})
+    finally:
+        if cache_key:
+            from app.services.result_cache import get_result_cache
+            get_result_cache().release(cache_key)
 
 
 
+async def run_chapter_job(job_id: str, pages: List[bytes], language: str, cache_keys: List[str]):
+    """Background task runner for a chapter: cached pages are reused, the rest go through the staged pipeline"""
+    print(f"👉 [Chapter] Starting chapter job {job_id} ({len(pages)} pages)")
+    from app.services.chapter_pipeline import run_chapter_pipeline
+    from app.services.result_cache import get_result_cache
+    from app.services.worker_pool import get_worker_pool
+    
+    events = get_event_broker()
+    cache = get_result_cache()
+    start_time = time.time()
+    
+    page_states = [{"page": i, "stage": "queued", "progress": 0} for i in range(len(pages))]
+    pending = []
+    for i, key in enumerate(cache_keys):
+        cached = cache.get(key)
+        if cached is not None and cached_result_usable(cached):
+            page_states[i].update(stage="done", progress=100, result=cached)
+        else:
+            pending.append(i)
+    
+    state_lock = threading.Lock()
+    
+    def save_pages(**fields):
+        with state_lock:
+            job_store.update(job_id, result={"pages": [dict(page) for page in page_states]}, **fields)
+    
+    def update_progress(pct: int, msg: str):
+        print(f"👉 [Chapter] {pct}% - {msg}")
+        job_store.update(job_id, progress=pct, message=msg)
+        events.publish(job_id, "progress", {"progress": pct, "message": msg})
+    
+    # The pipeline only sees pending pages, but numbers them (events, messages) by chapter index
+    def publish_partial(event: str, data: dict):
+        if event == "page":
+            with state_lock:
+                page_states[data["page"]].update(stage=data["stage"], progress=data["progress"])
+            save_pages()
+        events.publish(job_id, event, data)
+    
+    try:
+        save_pages(status="processing", progress=5, message=f"Đang xử lý {len(pending)}/{len(pages)} trang...")
+        
+        results = []
+        if pending:
+            results = await get_worker_pool().run(
+                run_chapter_pipeline, [pages[i] for i in pending], pending, len(pages),
+                on_progress=update_progress, on_event=publish_partial, lane="chapter"
+            )
+        
+        for i, page_result in zip(pending, results):
+            if "error" in page_result:
+                page_states[i].update(stage="failed", progress=100, error=page_result["error"])
+                continue
+            local = local_result_to_response(page_result)
+            response = jsonable_encoder(OCRResponse(
+                success=True,
+                regions=local["regions"],
+                language=language,
+                processing_time_ms=(time.time() - start_time) * 1000,
+                engine="local_advanced",
+                message=f"{len(local['regions'])} regions detected",
+                cleaned_image_url=local["cleaned_image_url"]
+            ))
+            page_states[i].update(stage="done", progress=100, result=response)
+            if local["regions"]:
+                cache.put(cache_keys[i], response)
+        
+        done = sum(1 for page in page_states if page["stage"] == "done")
+        if done == 0 and pages:
+            raise Exception(page_states[0].get("error") or "All pages failed")
+        
+        save_pages(status="completed", progress=100, message=f"Hoàn tất {done}/{len(pages)} trang!")
+        events.publish(job_id, "completed", completed_event_data({"pages": page_states}))
+        
+    except Exception as e:
+        logger.error(f"Chapter job failed: {e}")
+        job_store.update(job_id, status="failed", error=str(e))
+        events.publish(job_id, "failed", {"error": str(e)})
+
+
 @router.post("/detect", response_model=JobStatusResponse)
 async def start_detect_job(
     background_tasks: BackgroundTasks,
@@ -263,17 +431,37 @@ async def start_detect_job(
     """
     Start an async OCR job. Returns job_id to poll status.
     """
+    from app.services.result_cache import get_result_cache
+    
     job_id = str(uuid.uuid4())
     contents = await file.read()
+    cache = get_result_cache()
+    cache_key = pipeline_cache_key(contents, language, target_language, use_cotrans)
     
-    # Initialize job in store
-    ocr_jobs[job_id] = {
-        "job_id": job_id,
-        "status": "pending",
-        "progress": 0,
-        "message": "Đang xếp hàng...",
-        "created_at": time.time()
-    }
+    # Same page + same parameters already processed: complete immediately
+    cached = cache.get(cache_key)
+    if cached is not None and cached_result_usable(cached):
+        job = job_store.create(
+            job_id,
+            status="completed",
+            progress=100,
+            message="Hoàn tất! (cache)",
+            result=cached
+        )
+        return job_status_response(job)
+    
+    # Initialize job in store (before claiming, so every claimed job id has a record)
+    job_store.create(job_id, status="pending", progress=0, message="Đang xếp hàng...")
+    
+    # Identical page already being processed: attach to that job
+    inflight_job_id = cache.claim(cache_key, job_id)
+    while inflight_job_id is not None:
+        inflight_job = job_store.get(inflight_job_id)
+        if inflight_job is not None:
+            job_store.delete(job_id)
+            return job_status_response(inflight_job)
+        # Stale claim (job record gone): take over, unless another request already did
+        inflight_job_id = cache.take_over(cache_key, inflight_job_id, job_id)
     
     # Start background task
     background_tasks.add_task(
@@ -282,7 +470,8 @@ async def start_detect_job(
         contents, 
         language, 
         target_language, 
-        use_cotrans
+        use_cotrans,
+        cache_key
     )
     
     return JobStatusResponse(
@@ -293,29 +482,181 @@ async def start_detect_job(
     )
 
 
+@router.post("/chapter", response_model=ChapterStatusResponse)
+async def start_chapter_job(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    language: str = Form("jpn"),
+    target_language: str = Form("vie"),
+):
+    """
+    Start one job for an ordered set of pages (local pipeline only).
+    Stages overlap across pages; poll /chapter/{job_id} or stream /events/{job_id} for per-page progress.
+    """
+    if len(files) > CHAPTER_MAX_PAGES:
+        raise HTTPException(status_code=400, detail=f"Too many pages ({len(files)} > {CHAPTER_MAX_PAGES})")
+    
+    job_id = str(uuid.uuid4())
+    pages = [await file.read() for file in files]
+    cache_keys = [pipeline_cache_key(contents, language, target_language, False) for contents in pages]
+    
+    job = job_store.create(
+        job_id,
+        status="pending",
+        progress=0,
+        message="Đang xếp hàng...",
+        result={"pages": [{"page": i, "stage": "queued", "progress": 0} for i in range(len(pages))]}
+    )
+    background_tasks.add_task(run_chapter_job, job_id, pages, language, cache_keys)
+    
+    return chapter_status_response(job)
+
+
+@router.get("/chapter/{job_id}", response_model=ChapterStatusResponse)
+async def get_chapter_status(job_id: str):
+    """Overall and per-page status of a chapter job"""
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return chapter_status_response(job)
+
+
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
-    """Get status of an OCR job"""
-    job = ocr_jobs.get(job_id)
+async def get_job_status(job_id: str, inline_image: bool = False):
+    """
+    Get status of an OCR job.
+    The cleaned image is served by result.cleaned_image_url; inline_image=true also embeds it as a data URL.
+    """
+    job = job_store.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
         
-    # If completed, return result and maybe cleanup (optional cleanup logic omitted for simplicity)
-    return JobStatusResponse(
-        job_id=job_id,
-        status=job["status"],
-        progress=job["progress"],
-        message=job["message"],
-        result=job.get("result"),
-        error=job.get("error")
-    )
+    # Finished jobs expire after OCR_JOB_TTL_SECONDS (see job store)
+    return job_status_response(job, inline_image)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@router.get("/images/{image_id}")
+async def get_cleaned_image(
+    image_id: str,
+    request: Request,
+    format: str = Query("png", description="png, webp or jpeg"),
+    quality: int = Query(DEFAULT_QUALITY, ge=1, le=100, description="JPEG / lossy WebP quality"),
+    compression: Optional[int] = Query(None, ge=0, le=9, description="PNG compression level (default: CLEANED_PNG_COMPRESSION)"),
+    lossless: bool = Query(False, description="Lossless WebP"),
+):
+    """
+    Cleaned page as binary, encoded in the requested format.
+    Content-addressed: responses carry a strong ETag and are immutable, so repeat requests get 304.
+    422 when the page cannot be encoded in that format (WebP is limited to 16383px per side).
+    """
+    fmt = format.lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}', expected one of {list(FORMATS)}")
+    
+    store = get_image_store()
+    if image_id not in store:
+        raise HTTPException(status_code=404, detail="Image not found")
+    if compression is None:
+        compression = store.png_compression
+    
+    # The ETag is known without encoding: answer revalidations straight away
+    etag = f'"{image_id}-{variant_name(fmt, quality, compression, lossless)}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    # Encoding is CPU-bound (and cached per variant); keep it off the event loop
+    try:
+        found = await asyncio.to_thread(store.get_variant, image_id, fmt, quality, compression, lossless)
+    except ValueError as e:
+        # e.g. WebP for a strip taller than 16383px: the client can ask for PNG or JPEG instead
+        logger.warning(f"Cannot encode image {image_id} as {fmt}: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    return Response(content=found[0], media_type=FORMATS[fmt], headers=headers)
+
 
 
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/events/{job_id}")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream for an OCR job.
+    Events: progress, slice_regions (detection preview), regions (final boxes),
+    ocr (recognized text per batch), then completed or failed.
+    """
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    broker = get_event_broker()
+    subscriber, backlog = broker.subscribe(job_id)
+    
+    async def event_stream():
+        try:
+            # Re-read after subscribing so a job that just finished isn't missed
+            current = job_store.get(job_id) or job
+            if not backlog:
+                yield format_sse("progress", {"progress": current["progress"], "message": current["message"]})
+            
+            if current["status"] == "completed":
+                yield format_sse("completed", completed_event_data(current.get("result") or {}))
+                return
+            if current["status"] == "failed":
+                yield format_sse("failed", {"error": current.get("error")})
+                return
+            
+            for event, data in backlog:
+                yield format_sse(event, data)
+                if event in ("completed", "failed"):
+                    return
+            
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                event, data = item
+                yield format_sse(event, data)
+        finally:
+            broker.unsubscribe(job_id, subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.get("/status")
 async def get_ocr_status():
-    """Check status"""
-    return {"status": "online", "mode": "advanced_hybrid"}
+    """Check status (Cotrans state is the cached probe + breaker, no remote call here; hedge win rates)"""
+    from app.services.cotrans_health import get_cotrans_health
+    from app.services.hedging import get_hedge_stats
+    
+    return {
+        "status": "online",
+        "mode": "advanced_hybrid",
+        "cotrans": get_cotrans_health().snapshot(),
+        "hedge": {"enabled": OCR_HEDGE, "delay_s": OCR_HEDGE_DELAY_SECONDS, **get_hedge_stats().snapshot()},
+    }
 
 
 @router.get("/languages")
@@ -5,14 +5,37 @@ Translate text between languages
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
-import httpx
+from typing import Dict, List, Optional, Tuple
 import logging
 import asyncio
+import os
+
+from app.services.http_client import provider_request
+from app.services.local_translation import (
+    get_local_translation_engines,
+    is_local_translation_available,
+    resolve_model,
+)
+from app.services.text_packing import join_texts, pack_texts, split_packed
+from app.services.translation_memory import Key, get_translation_memory
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/translate", tags=["Translation"])
 
+MYMEMORY_API_URL = os.getenv("MYMEMORY_API_URL", "https://api.mymemory.translated.net/get")
+
+# MyMemory rejects queries above 500 bytes (UTF-8)
+MYMEMORY_MAX_QUERY_BYTES = int(os.getenv("MYMEMORY_MAX_QUERY_BYTES", "500"))
+
+# Join short texts into one provider request (opt-in; per request: TranslationRequest.pack).
+# A pack that splits into the right number of segments at the wrong boundaries still passes the
+# round-trip check, so results split out of a pack are returned but never remembered
+TRANSLATION_PACKING = os.getenv("TRANSLATION_PACKING", "false").lower() == "true"
+
+# mymemory (online API) or local (offline CTranslate2 model); per request: TranslationRequest.engine
+ENGINES = ("mymemory", "local")
+TRANSLATION_ENGINE = os.getenv("TRANSLATION_ENGINE", "mymemory").lower()
+
 # Language code mapping
 LANG_MAP = {
     "jpn": "ja",
@@ -28,12 +51,15 @@ class TranslationRequest(BaseModel):
     texts: List[str]
     source_lang: str
     target_lang: str
+    pack: Optional[bool] = None  # Several texts per provider request (default: TRANSLATION_PACKING)
+    engine: Optional[str] = None  # mymemory or local (default: TRANSLATION_ENGINE)
 
 
 class TranslatedText(BaseModel):
     original: str
     translated: str
     confidence: Optional[float] = None
+    cached: bool = False  # Served from translation memory
 
 
 class TranslationResponse(BaseModel):
@@ -42,33 +68,156 @@ class TranslationResponse(BaseModel):
     source_lang: str
     target_lang: str
     message: Optional[str] = None
+    cache_hits: int = 0  # Texts served from translation memory
+    engine: str = "mymemory"
 
 
-async def translate_with_mymemory(text: str, from_lang: str, to_lang: str) -> str:
-    """Translate using MyMemory API (free tier)"""
-    if not text.strip():
-        return text
-    
+async def request_mymemory(text: str, from_lang: str, to_lang: str) -> Optional[str]:
+    """Translate using MyMemory API (free tier); None if the provider failed"""
     try:
-        url = "https://api.mymemory.translated.net/get"
         params = {
             "q": text,
             "langpair": f"{from_lang}|{to_lang}"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=30.0)
-            data = response.json()
-            
-            if data.get("responseStatus") == 200:
-                return data["responseData"]["translatedText"]
-            else:
-                logger.warning(f"MyMemory error: {data.get('responseDetails')}")
-                return text
+        # Shared keep-alive client; concurrency, rate limit and retries per provider
+        response = await provider_request("mymemory", "GET", MYMEMORY_API_URL, params=params, timeout=30.0)
+        data = response.json()
+        
+        if data.get("responseStatus") == 200:
+            return data["responseData"]["translatedText"]
+        else:
+            logger.warning(f"MyMemory error: {data.get('responseDetails')}")
+            return None
                 
     except Exception as e:
         logger.error(f"Translation error: {str(e)}")
+        return None
+
+
+async def translate_with_mymemory(text: str, from_lang: str, to_lang: str) -> str:
+    """Translate using MyMemory API (free tier); returns the original text on failure"""
+    if not text.strip():
         return text
+    
+    translated = await request_mymemory(text, from_lang, to_lang)
+    return translated if translated is not None else text
+
+
+async def translate_packed(texts: List[str], from_lang: str, to_lang: str) -> Tuple[List[Optional[str]], List[bool]]:
+    """
+    Translate with as few provider requests as possible: texts are joined up to the max query size,
+    and a pack whose answer doesn't split back into one segment per text is retried text by text.
+    Returns the translations and, per text, whether it was split out of a multi-text pack.
+    """
+    groups = pack_texts(texts, MYMEMORY_MAX_QUERY_BYTES)
+    
+    async def translate_group(group: List[int]) -> Tuple[List[Optional[str]], bool]:
+        if len(group) == 1:
+            return [await request_mymemory(texts[group[0]], from_lang, to_lang)], False
+        
+        translated = await request_mymemory(join_texts([texts[i] for i in group]), from_lang, to_lang)
+        if translated is None:
+            return [None] * len(group), True
+        parts = split_packed(translated, len(group))
+        if parts is None:
+            logger.warning(f"Packed translation of {len(group)} texts did not round-trip, sending them one by one")
+            return await asyncio.gather(*(request_mymemory(texts[i], from_lang, to_lang) for i in group)), False
+        return parts, True
+    
+    results: List[Optional[str]] = [None] * len(texts)
+    packed = [False] * len(texts)
+    for group, (parts, from_pack) in zip(groups, await asyncio.gather(*(translate_group(g) for g in groups))):
+        for i, part in zip(group, parts):
+            results[i] = part
+            packed[i] = from_pack
+    return results, packed
+
+
+async def translate_locally(texts: List[str], from_lang: str, to_lang: str) -> List[Optional[str]]:
+    """Offline model for the pair, one batched call off the event loop; None for every text on failure"""
+    if not texts:
+        return []
+    try:
+        return await asyncio.to_thread(get_local_translation_engines().translate, from_lang, to_lang, texts)
+    except Exception as e:
+        logger.error(f"Local translation error: {str(e)}")
+        return [None] * len(texts)
+
+
+def resolve_engine(engine: Optional[str], from_lang: str, to_lang: str) -> str:
+    """Validate the requested engine for this pair (HTTP 400 if it can't serve it)"""
+    engine = (engine or TRANSLATION_ENGINE).lower()
+    if engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown translation engine '{engine}', expected one of {list(ENGINES)}")
+    if engine == "local":
+        if not is_local_translation_available():
+            raise HTTPException(status_code=400, detail="Local translation needs ctranslate2 + transformers installed")
+        try:
+            resolve_model(from_lang, to_lang)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return engine
+
+
+def memory_provider(engine: str, from_lang: str, to_lang: str) -> str:
+    """Provider name in translation memory keys (local entries are per model)"""
+    if engine == "local":
+        return f"local:{resolve_model(from_lang, to_lang)[0]}"
+    return engine
+
+
+async def translate_with_memory(
+    texts: List[str],
+    from_lang: str,
+    to_lang: str,
+    pack: Optional[bool] = None,
+    engine: str = "mymemory"
+) -> List[TranslatedText]:
+    """
+    Translate texts through the translation memory:
+    identical strings are sent once, known strings are not sent at all,
+    and new successful translations are remembered (except those split out of a pack).
+    """
+    memory = get_translation_memory()
+    provider = memory_provider(engine, from_lang, to_lang)
+    keys = [
+        memory.make_key(text, from_lang, to_lang, provider) if text.strip() else None
+        for text in texts
+    ]
+    # The normalized key only matches; providers get the first original spelling of each string
+    originals: Dict[Key, str] = {}
+    for text, key in zip(texts, keys):
+        if key is not None:
+            originals.setdefault(key, text)
+    unique_keys = list(originals)
+    
+    known = await asyncio.to_thread(memory.get_many, unique_keys)
+    missing = [key for key in unique_keys if key not in known]
+    sources = [originals[key] for key in missing]
+    
+    # Results split out of a pack may be misaligned: returned for this request, never remembered
+    packed = [False] * len(sources)
+    if engine == "local":
+        # Batched inference; packing is a network-only optimization
+        results = await translate_locally(sources, from_lang, to_lang)
+    elif pack if pack is not None else TRANSLATION_PACKING:
+        results, packed = await translate_packed(sources, from_lang, to_lang)
+    else:
+        # Translate all new strings concurrently (bounded by the provider limiter)
+        results = await asyncio.gather(*(request_mymemory(text, from_lang, to_lang) for text in sources))
+    fresh = {key: translated for key, translated in zip(missing, results) if translated is not None}
+    remembered = {key: translated for key, translated, from_pack in zip(missing, results, packed)
+                  if translated is not None and not from_pack}
+    await asyncio.to_thread(memory.put_many, remembered)
+    
+    translations = []
+    for text, key in zip(texts, keys):
+        if key in known:
+            translations.append(TranslatedText(original=text, translated=known[key], cached=True))
+        else:
+            translations.append(TranslatedText(original=text, translated=fresh.get(key, text)))
+    return translations
 
 
 @router.post("/batch", response_model=TranslationResponse)
@@ -80,38 +229,30 @@ async def translate_texts(request: TranslationRequest):
         texts: List of strings to translate
         source_lang: Source language code (jpn, kor, chi_sim, eng, etc.)
         target_lang: Target language code
+        engine: mymemory or local (default: TRANSLATION_ENGINE)
+        pack: Join short texts into one provider request (default: TRANSLATION_PACKING)
     
     Returns:
         List of original and translated text pairs
     """
+    from_lang = LANG_MAP.get(request.source_lang, request.source_lang)
+    to_lang = LANG_MAP.get(request.target_lang, request.target_lang)
+    engine = resolve_engine(request.engine, from_lang, to_lang)
+    
     try:
-        from_lang = LANG_MAP.get(request.source_lang, request.source_lang)
-        to_lang = LANG_MAP.get(request.target_lang, request.target_lang)
-        
-        logger.info(f"Translating {len(request.texts)} texts from {from_lang} to {to_lang}")
-        
-        # Translate all texts concurrently
-        tasks = [
-            translate_with_mymemory(text, from_lang, to_lang)
-            for text in request.texts
-        ]
+        logger.info(f"Translating {len(request.texts)} texts from {from_lang} to {to_lang} ({engine})")
         
-        translated_texts = await asyncio.gather(*tasks)
-        
-        translations = [
-            TranslatedText(
-                original=original,
-                translated=translated,
-            )
-            for original, translated in zip(request.texts, translated_texts)
-        ]
+        translations = await translate_with_memory(request.texts, from_lang, to_lang, request.pack, engine)
+        cache_hits = sum(1 for t in translations if t.cached)
         
         return TranslationResponse(
             success=True,
             translations=translations,
             source_lang=request.source_lang,
             target_lang=request.target_lang,
-            message=f"Translated {len(translations)} texts",
+            message=f"Translated {len(translations)} texts ({cache_hits} from translation memory)",
+            cache_hits=cache_hits,
+            engine=engine,
         )
         
     except Exception as e:
@@ -124,20 +265,24 @@ async def translate_single(
     text: str,
     source_lang: str = "jpn",
     target_lang: str = "vie",
+    engine: Optional[str] = None,
 ):
     """
     Translate a single text string.
     """
     from_lang = LANG_MAP.get(source_lang, source_lang)
     to_lang = LANG_MAP.get(target_lang, target_lang)
+    engine = resolve_engine(engine, from_lang, to_lang)
     
-    translated = await translate_with_mymemory(text, from_lang, to_lang)
+    translation = (await translate_with_memory([text], from_lang, to_lang, engine=engine))[0]
     
     return {
         "original": text,
-        "translated": translated,
+        "translated": translation.translated,
         "source_lang": source_lang,
         "target_lang": target_lang,
+        "cached": translation.cached,
+        "engine": engine,
     }
 
 
@@ -159,4 +304,8 @@ async def get_translation_languages():
             {"code": "kor", "name": "Korean", "native": "한국어"},
             {"code": "chi_sim", "name": "Chinese (Simplified)", "native": "简体中文"},
         ],
+        "engines": [
+            {"code": "mymemory", "available": True, "default": TRANSLATION_ENGINE == "mymemory"},
+            {"code": "local", "available": is_local_translation_available(), "default": TRANSLATION_ENGINE == "local"},
+        ],
     }
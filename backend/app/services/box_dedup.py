@@ -0,0 +1,75 @@
+"""
+Box Deduplication
+Greedy suppression of duplicate (x, y, w, h) boxes from overlapping slices and fallback detectors:
+1. Boxes are indexed by top edge, so each kept box only scores the boxes whose rows it can overlap
+   (a sorted-array sweep instead of comparing against every remaining box)
+2. Overlaps against those candidates are computed in one vectorized pass per kept box
+3. Modes:
+   - "compat": the original Malisiewicz suppression - lowest box first, drop others that overlap it
+     by more than `threshold` of their own area
+   - "iou": largest box first, drop others whose IoU with it exceeds `threshold`
+   - "containment": largest box first, drop others lying more than `threshold` inside it
+Coordinates follow the original inclusive-pixel convention (a w x h box covers (w + 1) x (h + 1) pixels).
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+MODES = ("compat", "iou", "containment")
+
+
+def dedup_boxes(boxes: List[Tuple], mode: str = "compat", threshold: float = 0.3) -> List[Tuple]:
+    """
+    Boxes kept after suppression, in the order they were picked.
+    In "compat" mode the result (content and order) matches the original _non_max_suppression.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown dedup mode '{mode}' (expected one of {', '.join(MODES)})")
+    if not boxes:
+        return []
+
+    b_array = np.array(boxes).astype(float)
+    x1 = b_array[:, 0]
+    y1 = b_array[:, 1]
+    x2 = b_array[:, 0] + b_array[:, 2]
+    y2 = b_array[:, 1] + b_array[:, 3]
+    area = (x2 - x1 + 1) * (y2 - y1 + 1)
+
+    if mode == "compat":
+        # Same argsort as the original, consumed from the end
+        order = np.argsort(y2)[::-1]
+    else:
+        order = np.argsort(-area, kind="stable")
+
+    # Index by top edge: a box can only overlap rows-wise with boxes whose top lies in
+    # (y1 - 1 - tallest, y2 + 1), found with two binary searches
+    by_top = np.argsort(y1, kind="stable")
+    tops = y1[by_top]
+    reach = float((y2 - y1).max()) + 1
+
+    alive = np.ones(len(boxes), dtype=bool)
+    pick = []
+    for i in order:
+        if not alive[i]:
+            continue
+        alive[i] = False
+        pick.append(i)
+
+        lo = np.searchsorted(tops, y1[i] - reach, side="right")
+        hi = np.searchsorted(tops, y2[i] + 1, side="left")
+        cand = by_top[lo:hi]
+        cand = cand[alive[cand]]
+        if cand.size == 0:
+            continue
+
+        w = np.maximum(0, np.minimum(x2[i], x2[cand]) - np.maximum(x1[i], x1[cand]) + 1)
+        h = np.maximum(0, np.minimum(y2[i], y2[cand]) - np.maximum(y1[i], y1[cand]) + 1)
+        inter = w * h
+        if mode == "iou":
+            overlap = inter / (area[i] + area[cand] - inter)
+        else:
+            overlap = inter / area[cand]
+        alive[cand[overlap > threshold]] = False
+
+    return [boxes[i] for i in pick]
@@ -2,18 +2,33 @@
 Speech Bubble Detector Service
 Uses YOLOv8 model for accurate speech bubble detection in manga/comics
 Model: ogkalu/comic-speech-bubble-detector-yolov8m (97.4% mAP)
+Backends: ultralytics (PyTorch) or ONNX Runtime CPU (BUBBLE_DETECTOR_BACKEND=onnx)
 """
 
 import logging
 from typing import List, Tuple, Optional
 from pathlib import Path
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Inference backend: "ultralytics" (PyTorch .pt) or "onnx" (ONNX Runtime CPU)
+DETECTOR_BACKEND = os.getenv("BUBBLE_DETECTOR_BACKEND", "ultralytics").lower()
+# int8 dynamic quantization of the ONNX model (onnx backend only)
+DETECTOR_INT8 = os.getenv("BUBBLE_DETECTOR_INT8", "false").lower() == "true"
+
 # Lazy load model
 _bubble_detector = None
 _model_path = None
+# One model per process shared by every pipeline thread (page and chapter lanes);
+# ultralytics models are not thread-safe, so loading and each forward pass hold this lock
+_detector_lock = threading.RLock()
+
+
+MODEL_REPO_ID = "ogkalu/comic-speech-bubble-detector-yolov8m"
+MODEL_FILENAME = "comic-speech-bubble-detector.pt"
+MODEL_CACHE_DIR = Path(__file__).parent / "models"
 
 
 def get_model_path() -> str:
@@ -30,9 +45,9 @@ def get_model_path() -> str:
         
         # Download model from Hugging Face
         _model_path = hf_hub_download(
-            repo_id="ogkalu/comic-speech-bubble-detector-yolov8m",
-            filename="comic-speech-bubble-detector.pt",
-            cache_dir=Path(__file__).parent / "models"
+            repo_id=MODEL_REPO_ID,
+            filename=MODEL_FILENAME,
+            cache_dir=MODEL_CACHE_DIR
         )
         
         logger.info(f"✅ Model downloaded to: {_model_path}")
@@ -45,8 +60,24 @@ def get_model_path() -> str:
 
 def get_bubble_detector():
     """Get or initialize YOLOv8 bubble detector (lazy loading)"""
+    with _detector_lock:
+        return _load_bubble_detector()
+
+
+def _load_bubble_detector():
     global _bubble_detector
     
+    if _bubble_detector is None and DETECTOR_BACKEND == "onnx":
+        from app.services.onnx_bubble_detector import OnnxBubbleDetector, export_onnx_model
+        
+        onnx_path = export_onnx_model(get_model_path(), int8=DETECTOR_INT8)
+        logger.info(f"🔄 Loading ONNX bubble detector ({'int8' if DETECTOR_INT8 else 'fp32'})...")
+        _bubble_detector = OnnxBubbleDetector(
+            onnx_path,
+            intra_op_threads=int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+        )
+        logger.info("✅ ONNX bubble detector loaded successfully!")
+    
     if _bubble_detector is None:
         try:
             from ultralytics import YOLO
@@ -84,34 +115,27 @@ def detect_speech_bubbles(
     """
     detector = get_bubble_detector()
     
-    # Run inference
-    results = detector(
-        image_path_or_array,
-        conf=confidence_threshold,
-        iou=iou_threshold,
-        verbose=False
-    )
-    
-    bubbles = []
-    
-    for result in results:
-        boxes = result.boxes
+    if DETECTOR_BACKEND == "onnx":
+        image = image_path_or_array
+        if isinstance(image, (str, Path)):
+            import cv2
+            image = cv2.imread(str(image), cv2.IMREAD_COLOR)
+        with _detector_lock:
+            bubbles = detector.predict([image], confidence_threshold, iou_threshold)[0]
+    else:
+        # Run inference
+        with _detector_lock:
+            results = detector(
+                image_path_or_array,
+                conf=confidence_threshold,
+                iou=iou_threshold,
+                verbose=False
+            )
+        
+        bubbles = []
         
-        if boxes is not None:
-            for box in boxes:
-                # Get bounding box coordinates (xyxy format)
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                confidence = box.conf[0].item()
-                class_id = int(box.cls[0].item())
-                class_name = result.names.get(class_id, "bubble")
-                
-                # Convert to x, y, width, height
-                x = int(x1)
-                y = int(y1)
-                width = int(x2 - x1)
-                height = int(y2 - y1)
-                
-                bubbles.append((x, y, width, height, confidence, class_name))
+        for result in results:
+            bubbles.extend(_result_to_bubbles(result))
     
     # Sort by position (top to bottom, left to right)
     bubbles.sort(key=lambda b: (b[1] // 100, b[0]))
@@ -120,8 +144,135 @@ def detect_speech_bubbles(
     return bubbles
 
 
+def detect_speech_bubbles_batch(
+    images: List,
+    confidence_threshold: float = 0.5,
+    iou_threshold: float = 0.5,
+    batch_size: int = 8
+) -> List[List[Tuple[int, int, int, int, float, str]]]:
+    """
+    Detect speech bubbles in several images with batched YOLOv8 forward passes.
+    
+    Args:
+        images: List of numpy arrays (e.g. slices of one long page)
+        confidence_threshold: Minimum confidence score (0-1)
+        iou_threshold: IoU threshold for NMS
+        batch_size: Maximum number of images per forward pass
+    
+    Returns:
+        One list of (x, y, width, height, confidence, class_name) per input image,
+        in the same order as `images`, with coordinates local to each image
+    """
+    if not images:
+        return []
+    
+    detector = get_bubble_detector()
+    batch_size = max(1, batch_size)
+    
+    all_bubbles = []
+    
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        
+        # Held per forward pass, so a page job and a chapter job take turns batch by batch
+        with _detector_lock:
+            if DETECTOR_BACKEND == "onnx":
+                chunk_bubbles = detector.predict(list(chunk), confidence_threshold, iou_threshold)
+            else:
+                # ultralytics runs a list source as a single batch
+                results = detector(
+                    list(chunk),
+                    conf=confidence_threshold,
+                    iou=iou_threshold,
+                    verbose=False
+                )
+                chunk_bubbles = [_result_to_bubbles(result) for result in results]
+        
+        for bubbles in chunk_bubbles:
+            bubbles.sort(key=lambda b: (b[1] // 100, b[0]))
+            all_bubbles.append(bubbles)
+    
+    logger.info(
+        f"Detected {sum(len(b) for b in all_bubbles)} speech bubbles "
+        f"in {len(images)} images (batch size {batch_size})"
+    )
+    return all_bubbles
+
+
+def _result_to_bubbles(result) -> List[Tuple[int, int, int, int, float, str]]:
+    """Convert one ultralytics result into (x, y, width, height, confidence, class_name) tuples"""
+    bubbles = []
+    boxes = result.boxes
+    
+    if boxes is not None:
+        for box in boxes:
+            # Get bounding box coordinates (xyxy format)
+            x1, y1, x2, y2 = box.xyxy[0].tolist()
+            confidence = box.conf[0].item()
+            class_id = int(box.cls[0].item())
+            class_name = result.names.get(class_id, "bubble")
+            
+            # Convert to x, y, width, height
+            x = int(x1)
+            y = int(y1)
+            width = int(x2 - x1)
+            height = int(y2 - y1)
+            
+            bubbles.append((x, y, width, height, confidence, class_name))
+    
+    return bubbles
+
+
+def warmup_bubble_detector() -> dict:
+    """Load the detector and run one dummy forward pass; returns timings in ms"""
+    import time
+    import numpy as np
+    
+    start = time.perf_counter()
+    get_bubble_detector()
+    loaded = time.perf_counter()
+    detect_speech_bubbles(np.full((640, 640, 3), 255, dtype=np.uint8))
+    warmed = time.perf_counter()
+    
+    return {
+        "load_ms": round((loaded - start) * 1000, 1),
+        "warmup_ms": round((warmed - loaded) * 1000, 1),
+    }
+
+
+def is_bubble_detector_loaded() -> bool:
+    return _bubble_detector is not None
+
+
+def _downloaded_model_path() -> Optional[str]:
+    """Path of the .pt model if it is already downloaded (never downloads)"""
+    if _model_path and os.path.exists(_model_path):
+        return _model_path
+    try:
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(
+            repo_id=MODEL_REPO_ID,
+            filename=MODEL_FILENAME,
+            cache_dir=MODEL_CACHE_DIR,
+            local_files_only=True
+        )
+    except Exception:
+        return None
+
+
 def is_bubble_detector_available() -> bool:
     """Check if YOLOv8 and model are available"""
+    if DETECTOR_BACKEND == "onnx":
+        from app.services.onnx_bubble_detector import is_onnx_model_exported, is_onnx_runtime_available
+        if not is_onnx_runtime_available():
+            return False
+        # Already exported models don't need ultralytics any more (only the export does)
+        if _bubble_detector is not None:
+            return True
+        pt_path = _downloaded_model_path()
+        if pt_path is not None and is_onnx_model_exported(pt_path, DETECTOR_INT8):
+            return True
+    
     try:
         from ultralytics import YOLO
         return True
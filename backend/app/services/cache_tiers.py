@@ -0,0 +1,148 @@
+"""
+Cache Tiers
+Storage tiers shared by the OCR result cache and the cleaned image store:
+1. MemoryLRU: in-memory LRU bounded by bytes
+2. DiskTier: one file per key in a directory, bounded by bytes, least recently used evicted first.
+   The directory is scanned once at startup; after that sizes and recency are tracked in memory,
+   so writes never re-list the directory.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryLRU:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes):
+        """Insert and evict the oldest entries over budget (entries larger than the budget are skipped)"""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+            self._entries[key] = data
+            self._bytes += len(data)
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def pop(self, key: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+
+class DiskTier:
+    def __init__(self, directory: str, suffix: str, max_bytes: int, name: str = "Cache"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.name = name
+
+        # key -> size on disk, least recently used first
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _scan(self):
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.name[:-len(self.suffix)], stat.st_size))
+        entries.sort()
+        with self._lock:
+            for _, key, size in entries:
+                self._sizes[key] = size
+                self._bytes += size
+        self._evict()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def __contains__(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        if not path.exists():
+            return None
+        try:
+            data = path.read_bytes()
+            # Refresh mtime so recency survives a restart
+            os.utime(path, None)
+        except OSError as e:
+            logger.warning(f"{self.name} disk read failed: {e}")
+            return None
+
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+            else:
+                self._sizes[key] = len(data)
+                self._bytes += len(data)
+        return data
+
+    def write(self, key: str, data: bytes):
+        path = self.path(key)
+        try:
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"{self.name} disk write failed: {e}")
+            return
+
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            self._bytes += len(data)
+        self._evict()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+        self.path(key).unlink(missing_ok=True)
+
+    def _evict(self):
+        """Delete least recently used files until the tier fits its budget"""
+        while True:
+            with self._lock:
+                if self._bytes <= self.max_bytes or not self._sizes:
+                    return
+                key, size = self._sizes.popitem(last=False)
+                self._bytes -= size
+            try:
+                self.path(key).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"{self.name} disk eviction failed: {e}")
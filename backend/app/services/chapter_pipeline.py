@@ -0,0 +1,175 @@
+"""
+Chapter Pipeline
+Runs the local pipeline over an ordered set of pages as one CPU-bound task.
+Each stage (decode, detect, inpaint, OCR, encode) has its own thread, connected by bounded
+queues, so page N+1 is being detected while page N is in OCR.
+Takes and returns plain (picklable) data so it can run in a worker process.
+"""
+
+import logging
+import os
+import queue
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("decode", "detect", "inpaint", "ocr", "encode")
+STAGE_MESSAGES = {
+    "decode": "đã đọc ảnh",
+    "detect": "đã phát hiện text",
+    "inpaint": "đã tẩy text",
+    "ocr": "đã OCR",
+    "encode": "hoàn tất",
+}
+
+# Pages waiting between two stages; bounds memory to a few decoded pages per stage
+CHAPTER_QUEUE_SIZE = int(os.getenv("CHAPTER_QUEUE_SIZE", "2"))
+
+
+class _Page:
+    def __init__(self, position: int, index: int, contents: bytes):
+        self.position = position  # In the pages passed to the pipeline
+        self.index = index  # In the whole chapter
+        self.contents = contents
+        self.decoded = None  # DecodedPage
+        self.crops = []
+        self.regions: List[dict] = []
+        self.boxes: List[tuple] = []
+        self.cleaned = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+
+
+def run_chapter_pipeline(
+    pages: List[bytes],
+    page_indexes: Optional[List[int]] = None,
+    chapter_pages: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    event_callback: Optional[Callable[[str, dict], None]] = None
+) -> List[dict]:
+    """
+    Detect, clean and OCR every page of a chapter with the stages overlapped across pages.
+    Per-page progress goes to event_callback as "page" events ({page, stage, progress[, error]});
+    partial results ("regions", "ocr") carry the page index too.
+    page_indexes / chapter_pages: when only some pages of a chapter need processing (the rest came
+    from the cache), each page's index in the chapter and the chapter size, used for events and messages.
+
+    Returns, in page order:
+        {"regions": [region dicts with text], "cleaned_png": PNG bytes} or {"error": str}
+    """
+    from app.services.image_processor import get_manga_processor
+    from app.services.image_store import encode_png, get_png_compression
+    from app.services.local_pipeline import ocr_region_crops
+
+    processor = get_manga_processor()
+    if page_indexes is None:
+        page_indexes = list(range(len(pages)))
+    if chapter_pages is None:
+        chapter_pages = len(pages)
+    png_compression = get_png_compression()
+    total_steps = len(pages) * len(STAGES)
+    done_steps = 0
+    progress_lock = threading.Lock()
+
+    def page_events(page: _Page):
+        if not event_callback:
+            return None
+        def forward(event: str, data: dict):
+            # slice_regions previews are too chatty for a whole chapter
+            if event != "slice_regions":
+                event_callback(event, {"page": page.index, **data})
+        return forward
+
+    def decode(page: _Page):
+        page.decoded = processor.decode_page(page.contents)
+        page.contents = None
+
+    def detect(page: _Page):
+        page.regions, page.boxes = processor.detect_regions(page.decoded.bgr, None, page_events(page))
+        # OCR crops come from the original pixels, like run_local_pipeline; taken before in-place cleaning
+        page.crops = page.decoded.crop_boxes(page.boxes)
+
+    def inpaint(page: _Page):
+        page.cleaned = processor.clean(page.decoded.bgr, page.boxes, in_place=True)
+        page.decoded = None
+
+    def ocr(page: _Page):
+        page.regions = ocr_region_crops(page.crops, page.regions, page_events(page))
+        page.crops = []
+
+    def encode(page: _Page):
+        page.result = {"regions": page.regions, "cleaned_png": encode_png(page.cleaned, png_compression)}
+        page.cleaned = None
+
+    def report(page: _Page, stage_index: int):
+        nonlocal done_steps
+        stage = STAGES[stage_index]
+        with progress_lock:
+            done_steps += 1
+            overall = 5 + int(done_steps / total_steps * 90)  # 5% -> 95%
+        try:
+            if event_callback:
+                data = {"page": page.index, "stage": stage, "progress": (stage_index + 1) * 100 // len(STAGES)}
+                if page.error:
+                    data["error"] = page.error
+                event_callback("page", data)
+            if progress_callback:
+                status = f"lỗi ({page.error})" if page.error else STAGE_MESSAGES[stage]
+                progress_callback(overall, f"Trang {page.index + 1}/{chapter_pages}: {status}")
+        except Exception as e:
+            # A failing callback must not stall the pipeline
+            logger.warning(f"Chapter progress callback failed: {e}")
+
+    def run_stage(stage_index: int, fn: Callable, inbox: queue.Queue, outbox: queue.Queue):
+        while True:
+            page = inbox.get()
+            if page is None:
+                outbox.put(None)
+                return
+            if page.error is None:
+                try:
+                    fn(page)
+                except Exception as e:
+                    logger.error(f"Chapter page {page.index + 1} failed in {STAGES[stage_index]}: {e}")
+                    page.error = str(e)
+            report(page, stage_index)
+            outbox.put(page)
+
+    if progress_callback:
+        progress_callback(5, f"Đang xử lý {len(pages)} trang...")
+
+    stage_fns = (decode, detect, inpaint, ocr, encode)
+    queues = [queue.Queue(maxsize=max(1, CHAPTER_QUEUE_SIZE)) for _ in range(len(stage_fns) + 1)]
+    threads = [
+        threading.Thread(
+            target=run_stage,
+            args=(i, fn, queues[i], queues[i + 1]),
+            name=f"chapter-{STAGES[i]}",
+            daemon=True,
+        )
+        for i, fn in enumerate(stage_fns)
+    ]
+    for thread in threads:
+        thread.start()
+
+    def feed():
+        for position, (index, contents) in enumerate(zip(page_indexes, pages)):
+            queues[0].put(_Page(position, index, contents))
+        queues[0].put(None)
+
+    feeder = threading.Thread(target=feed, name="chapter-feed", daemon=True)
+    feeder.start()
+
+    results: List[Optional[dict]] = [None] * len(pages)
+    while True:
+        page = queues[-1].get()
+        if page is None:
+            break
+        results[page.position] = page.result if page.error is None else {"error": page.error}
+
+    feeder.join()
+    for thread in threads:
+        thread.join()
+
+    return results
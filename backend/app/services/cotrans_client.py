@@ -0,0 +1,186 @@
+"""
+Cotrans Client
+Efficient access to the Cotrans task API:
+1. Shared pooled connection (app/services/http_client.py, provider "cotrans")
+2. Multipart upload of the raw image; a page the server rejects as an unsupported body is resent as
+   base64 JSON, and uploads switch to JSON only after several rejections in a row
+3. One poller loop multiplexing status checks of every in-flight task,
+   with per-task adaptive backoff (fast while the task moves, slower while it waits)
+"""
+
+import asyncio
+import base64
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from app.services.http_client import provider_request
+
+logger = logging.getLogger(__name__)
+
+# Upload status codes meaning "this endpoint doesn't take that body" (no task was created, so
+# resending as JSON is safe); 400/422 are about the image itself and are returned as they are
+UNSUPPORTED_UPLOAD = {404, 405, 415}
+# Consecutive multipart rejections before every upload goes straight to JSON
+MULTIPART_REJECTIONS_BEFORE_JSON = 3
+
+
+class _PendingTask:
+    def __init__(self, task_id: str, deadline: float, interval: float, future: asyncio.Future):
+        self.task_id = task_id
+        self.deadline = deadline
+        self.interval = interval
+        self.next_poll = time.monotonic() + interval
+        self.state: Optional[str] = None
+        self.future = future
+
+
+class CotransClient:
+    def __init__(
+        self,
+        base_url: str,
+        upload_mode: str = "multipart",
+        poll_min: float = 0.5,
+        poll_max: float = 5.0,
+        poll_factor: float = 1.5,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.upload_mode = upload_mode
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+        self._multipart_rejections = 0
+        self._tasks: Dict[str, _PendingTask] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    # --- Upload ---
+
+    async def upload(self, image_bytes: bytes, params: dict) -> dict:
+        """
+        Submit one image; returns the upload response (task_id, or a finished result).
+        Uploads create tasks, so they are never retried once sent (a retry could run the page twice).
+        """
+        if self.upload_mode == "multipart":
+            response = await provider_request(
+                "cotrans", "POST", f"{self.base_url}/task/upload", idempotent=False,
+                files={"file": ("image", image_bytes, "application/octet-stream")},
+                data={k: str(v) for k, v in params.items()},
+            )
+            if response.status_code not in UNSUPPORTED_UPLOAD:
+                self._multipart_rejections = 0
+                return response.json()
+            self._multipart_rejections += 1
+            logger.warning(f"Cotrans multipart upload rejected ({response.status_code}), resending as base64 JSON")
+            if self._multipart_rejections >= MULTIPART_REJECTIONS_BEFORE_JSON:
+                logger.warning("Cotrans keeps rejecting multipart uploads, using base64 JSON from now on")
+                self.upload_mode = "json"
+
+        payload = {"image": base64.b64encode(image_bytes).decode("utf-8"), **params}
+        response = await provider_request("cotrans", "POST", f"{self.base_url}/task/upload", idempotent=False, json=payload)
+        if response.status_code != 200:
+            logger.error(f"Cotrans API error: {response.status_code}")
+            # Try alternative endpoint
+            response = await provider_request("cotrans", "POST", f"{self.base_url}/submit", idempotent=False, json=payload)
+        return response.json()
+
+    # --- Polling ---
+
+    async def wait_for(self, task_id: str, timeout: float) -> dict:
+        """Resolve when the shared poller sees the task finish; raises on error or timeout"""
+        loop = asyncio.get_running_loop()
+        task = _PendingTask(task_id, time.monotonic() + timeout, self.poll_min, loop.create_future())
+        self._tasks[task_id] = task
+        self._ensure_poller()
+        try:
+            return await task.future
+        finally:
+            self._tasks.pop(task_id, None)
+
+    def _ensure_poller(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+
+    async def _poll_loop(self):
+        """Single loop for all in-flight tasks: sleep until the next one is due, poll every due task at once"""
+        while self._tasks:
+            now = time.monotonic()
+            due = [task for task in self._tasks.values() if task.next_poll <= now]
+            if due:
+                await asyncio.gather(*(self._poll(task) for task in due))
+                continue
+
+            next_poll = min(task.next_poll for task in self._tasks.values())
+            self._wakeup.clear()
+            try:
+                # New tasks wake the loop early
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_poll - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, task: _PendingTask):
+        if task.future.done():
+            return
+        if time.monotonic() > task.deadline:
+            task.future.set_exception(Exception("Translation timeout"))
+            return
+
+        try:
+            response = await provider_request("cotrans", "GET", f"{self.base_url}/task/{task.task_id}/status")
+            status = response.json()
+        except Exception as e:
+            logger.warning(f"Cotrans status check for {task.task_id} failed: {e}")
+            status = {}
+
+        state = status.get("state")
+        if state == "finished":
+            task.future.set_result(status.get("result", {}))
+            return
+        if state == "error":
+            task.future.set_exception(Exception(status.get("error", "Translation failed")))
+            return
+
+        # Adaptive backoff: poll fast right after a state change, back off while nothing moves
+        if state != task.state:
+            task.state = state
+            task.interval = self.poll_min
+        else:
+            task.interval = min(self.poll_max, task.interval * self.poll_factor)
+        task.next_poll = time.monotonic() + task.interval
+
+    async def translate(self, image_bytes: bytes, params: dict, timeout: float) -> dict:
+        """Upload + wait for the task; `timeout` bounds the whole call, upload included"""
+        deadline = time.monotonic() + timeout
+
+        async def upload_and_wait() -> dict:
+            result = await self.upload(image_bytes, params)
+            if "task_id" in result:
+                return await self.wait_for(result["task_id"], max(0.0, deadline - time.monotonic()))
+            return result
+
+        try:
+            return await asyncio.wait_for(upload_and_wait(), timeout)
+        except asyncio.TimeoutError:
+            raise Exception("Translation timeout")
+
+
+# Singleton instance
+_cotrans_client = None
+
+
+def get_cotrans_client() -> CotransClient:
+    global _cotrans_client
+    if _cotrans_client is None:
+        from app.services.cotrans_service import COTRANS_API_URL
+
+        _cotrans_client = CotransClient(
+            COTRANS_API_URL,
+            upload_mode=os.getenv("COTRANS_UPLOAD_MODE", "multipart").lower(),
+            poll_min=float(os.getenv("COTRANS_POLL_MIN_SECONDS", "0.5")),
+            poll_max=float(os.getenv("COTRANS_POLL_MAX_SECONDS", "5")),
+        )
+    return _cotrans_client
@@ -0,0 +1,220 @@
+"""
+Cotrans Health
+Decides whether a job should try Cotrans at all, so local-pipeline jobs never wait on a dead remote:
+1. Circuit breaker over recent Cotrans calls (closed -> open on error rate or slow-call rate,
+   open -> half-open after a cool-down, half-open lets one trial call through)
+2. Async background probe of the Cotrans API whose cached result also gates routing
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_seconds: float = 30.0,
+        slow_rate: float = 0.5,
+        open_seconds: float = 60.0,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        # (success, latency_s) of the most recent calls
+        self._calls = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def _open(self, reason: str):
+        if self._state != OPEN:
+            logger.warning(f"⚡ [{self.name}] circuit open: {reason}")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """True if a call may go through now (half-open admits a single trial call)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, success: bool, latency: float, error: Optional[str] = None):
+        with self._lock:
+            if not success:
+                self._last_error = error
+            slow = latency >= self.slow_seconds
+
+            if self._state == HALF_OPEN:
+                if success and not slow:
+                    logger.info(f"✅ [{self.name}] circuit closed after a good trial call")
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open("trial call failed" if not success else f"trial call took {latency:.1f}s")
+                return
+
+            self._calls.append((success, latency))
+            if self._state != CLOSED or len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+            slow_calls = sum(1 for _, t in self._calls if t >= self.slow_seconds) / len(self._calls)
+            if failures >= self.error_rate:
+                self._open(f"{failures:.0%} of the last {len(self._calls)} calls failed")
+            elif slow_calls >= self.slow_rate:
+                self._open(f"{slow_calls:.0%} of the last {len(self._calls)} calls took >= {self.slow_seconds:.0f}s")
+
+    def release(self):
+        """The admitted call was abandoned without an outcome (e.g. cancelled): free the half-open trial slot"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def trip(self, reason: str):
+        """Open immediately (e.g. the health probe saw the remote down)"""
+        with self._lock:
+            self._open(reason)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            calls = list(self._calls)
+            return {
+                "state": state,
+                "recent_calls": len(calls),
+                "error_rate": round(sum(1 for ok, _ in calls if not ok) / len(calls), 3) if calls else 0.0,
+                "slow_rate": round(sum(1 for _, t in calls if t >= self.slow_seconds) / len(calls), 3) if calls else 0.0,
+                "retry_in_s": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if state == OPEN else None,
+                "last_error": self._last_error,
+            }
+
+
+class CotransHealth:
+    """Cached Cotrans reachability, refreshed by a background probe; routing reads only the cache"""
+
+    def __init__(self, breaker: CircuitBreaker, interval: float = 30.0, probe_timeout: float = 5.0):
+        self.breaker = breaker
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.healthy: Optional[bool] = None  # None until the first probe finishes
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def should_try(self) -> bool:
+        """Try Cotrans for this job? Never blocks: cached probe state + breaker"""
+        if self.healthy is False and self.breaker.state != HALF_OPEN:
+            return False
+        return self.breaker.allow_request()
+
+    async def probe(self) -> bool:
+        from app.services.cotrans_service import COTRANS_API_URL
+        from app.services.http_client import get_http_client
+
+        start = time.perf_counter()
+        try:
+            # Any HTTP answer means the API is up; only transport errors / timeouts / 5xx count as down
+            response = await get_http_client().get(COTRANS_API_URL, timeout=self.probe_timeout)
+            healthy = response.status_code < 500
+            self.error = None if healthy else f"HTTP {response.status_code}"
+        except Exception as e:
+            healthy = False
+            self.error = str(e) or type(e).__name__
+
+        self.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.checked_at = time.time()
+        if self.healthy is not False and not healthy:
+            self.breaker.trip(f"health probe failed: {self.error}")
+        self.healthy = healthy
+        return healthy
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Cotrans health probe crashed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "checked_at": self.checked_at,
+            "probe_latency_ms": self.latency_ms,
+            "probe_error": self.error,
+            "breaker": self.breaker.snapshot(),
+        }
+
+
+# Singleton instance
+_cotrans_health: Optional[CotransHealth] = None
+
+
+def get_cotrans_health() -> CotransHealth:
+    global _cotrans_health
+    if _cotrans_health is None:
+        breaker = CircuitBreaker(
+            "cotrans",
+            window=int(os.getenv("COTRANS_BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("COTRANS_BREAKER_MIN_CALLS", "5")),
+            error_rate=float(os.getenv("COTRANS_BREAKER_ERROR_RATE", "0.5")),
+            slow_seconds=float(os.getenv("COTRANS_BREAKER_SLOW_SECONDS", "30")),
+            slow_rate=float(os.getenv("COTRANS_BREAKER_SLOW_RATE", "0.5")),
+            open_seconds=float(os.getenv("COTRANS_BREAKER_OPEN_SECONDS", "60")),
+        )
+        _cotrans_health = CotransHealth(
+            breaker,
+            interval=float(os.getenv("COTRANS_HEALTH_INTERVAL_SECONDS", "30")),
+            probe_timeout=float(os.getenv("COTRANS_HEALTH_TIMEOUT_SECONDS", "5")),
+        )
+    return _cotrans_health
@@ -5,17 +5,20 @@ API: api.cotrans.touhou.ai
 """
 
 import logging
+import os
 import httpx
-import base64
 from typing import List, Optional
 import uuid
-import asyncio
+
+from app.services.cotrans_client import get_cotrans_client
 
 logger = logging.getLogger(__name__)
 
 # Cotrans API configuration
-COTRANS_API_URL = "https://api.cotrans.touhou.ai"
+COTRANS_API_URL = os.getenv("COTRANS_API_URL", "https://api.cotrans.touhou.ai")
 COTRANS_WEB_URL = "https://cotrans.touhou.ai"
+# Upper bound for one page (upload + waiting for the task)
+COTRANS_TIMEOUT_SECONDS = float(os.getenv("COTRANS_TIMEOUT_SECONDS", "120"))
 
 # Supported languages
 COTRANS_LANGUAGES = {
@@ -55,23 +58,19 @@ async def translate_manga_with_cotrans(
         detector: Text detector ("default", "ctd", "craft")
         direction: Text direction ("auto", "horizontal", "vertical")
         translator: Translation service
-        timeout: Request timeout in seconds
+        timeout: Upper bound in seconds for the whole call (upload + waiting for the task)
     
     Returns:
         Dict with translated image and detected text regions
     """
     logger.info(f"Calling Cotrans API: {source_lang} -> {target_lang}")
     
-    # Convert to base64
-    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-    
     # Map language codes
     src_lang = COTRANS_LANGUAGES.get(source_lang, "JPN")
     tgt_lang = COTRANS_TARGET_LANGUAGES.get(target_lang, "VIE")
     
     # Prepare request
-    payload = {
-        "image": image_base64,
+    params = {
         "source_lang": src_lang,
         "target_lang": tgt_lang,
         "detector": detector,
@@ -81,29 +80,8 @@ async def translate_manga_with_cotrans(
     }
     
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            # Submit translation task
-            response = await client.post(
-                f"{COTRANS_API_URL}/task/upload",
-                json=payload
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Cotrans API error: {response.status_code}")
-                # Try alternative endpoint
-                response = await client.post(
-                    f"{COTRANS_API_URL}/submit",
-                    json=payload
-                )
-            
-            result = response.json()
-            
-            if "task_id" in result:
-                # Poll for result
-                task_id = result["task_id"]
-                return await poll_cotrans_result(client, task_id, timeout)
-            
-            return result
+        # Shared connection + one poller for every in-flight task (app/services/cotrans_client.py)
+        return await get_cotrans_client().translate(image_bytes, params, timeout)
             
     except httpx.TimeoutException:
         logger.error("Cotrans API timeout")
@@ -113,26 +91,6 @@ async def translate_manga_with_cotrans(
         raise
 
 
-async def poll_cotrans_result(client: httpx.AsyncClient, task_id: str, timeout: int) -> dict:
-    """Poll Cotrans API for translation result"""
-    start_time = asyncio.get_event_loop().time()
-    
-    while True:
-        elapsed = asyncio.get_event_loop().time() - start_time
-        if elapsed > timeout:
-            raise Exception("Translation timeout")
-        
-        response = await client.get(f"{COTRANS_API_URL}/task/{task_id}/status")
-        status = response.json()
-        
-        if status.get("state") == "finished":
-            return status.get("result", {})
-        elif status.get("state") == "error":
-            raise Exception(status.get("error", "Translation failed"))
-        
-        await asyncio.sleep(2)
-
-
 def extract_regions_from_cotrans_result(result: dict, source_lang: str) -> List[dict]:
     """Extract text regions from Cotrans API result"""
     regions = []
@@ -183,7 +141,8 @@ async def process_manga_with_cotrans(
         result = await translate_manga_with_cotrans(
             image_bytes,
             source_lang=source_lang,
-            target_lang=target_lang
+            target_lang=target_lang,
+            timeout=COTRANS_TIMEOUT_SECONDS
         )
         
         regions = extract_regions_from_cotrans_result(result, source_lang)
@@ -206,10 +165,7 @@ async def process_manga_with_cotrans(
 
 
 def is_cotrans_available() -> bool:
-    """Check if Cotrans API is reachable"""
-    try:
-        import httpx
-        response = httpx.get(f"{COTRANS_WEB_URL}", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+    """Cached Cotrans reachability from the background health probe (never blocks)"""
+    from app.services.cotrans_health import get_cotrans_health
+
+    return get_cotrans_health().healthy is not False
@@ -0,0 +1,149 @@
+"""
+Decoded Page
+One page decoded once into a single BGR pixel buffer, shared by every pipeline stage:
+1. OpenCV stages (detection slices, inpainting ROIs) get numpy views of the buffer, no copies
+2. OCR crops are converted to RGB per crop, so only bubble-sized copies are made
+
+Very tall pages (STREAMING_MIN_HEIGHT) are decoded by pyvips in horizontal bands into a memory-mapped
+scratch file instead of anonymous memory, so peak RSS stays at a few bands regardless of page height.
+Every stage then works band by band on views of the mapping (detection slices, inpainting ROIs, the
+slice planner's row profile, the PNG encoder), whose pages the OS can drop and re-read as needed.
+Without pyvips there is no band-wise decoder and pages are always decoded whole.
+"""
+
+import io
+import logging
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Pages at least this tall are decoded band by band into a scratch file (0 = never)
+STREAMING_MIN_HEIGHT = int(os.getenv("STREAMING_MIN_HEIGHT", "12000"))
+# Scratch files for streamed pages (default: system temp dir); deleted when the page is released
+STREAMING_SCRATCH_DIR = os.getenv("STREAMING_SCRATCH_DIR") or None
+
+
+def _load_pyvips():
+    try:
+        import pyvips
+        return pyvips
+    except (ImportError, OSError):
+        return None
+
+
+def peek_size(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the image header without decoding pixels (None if unreadable)"""
+    pyvips = _load_pyvips()
+    try:
+        if pyvips is not None:
+            header = pyvips.Image.new_from_buffer(image_bytes, "", access="sequential")
+            return header.width, header.height
+        with Image.open(io.BytesIO(image_bytes)) as header:
+            return header.size
+    except Exception as e:
+        logger.warning(f"Could not read image header: {e}")
+        return None
+
+
+def should_stream(image_bytes: bytes) -> bool:
+    """Stream only when pyvips can decode band by band (a whole decode copied to scratch saves nothing)"""
+    if STREAMING_MIN_HEIGHT <= 0 or _load_pyvips() is None:
+        return False
+    size = peek_size(image_bytes)
+    return size is not None and size[1] >= STREAMING_MIN_HEIGHT
+
+
+class DecodedPage:
+    def __init__(self, bgr: np.ndarray):
+        self.bgr = bgr
+
+    @classmethod
+    def from_bytes(cls, image_bytes: bytes) -> "DecodedPage":
+        nparr = np.frombuffer(image_bytes, np.uint8)
+        bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError("Could not decode image")
+
+        full_h, full_w = bgr.shape[:2]
+        logger.info(f"Processing image: {full_w}x{full_h}")
+        return cls(bgr)
+
+    @classmethod
+    def from_bytes_streaming(cls, image_bytes: bytes, band_height: int = 2000) -> "DecodedPage":
+        """Decode with pyvips into a memory-mapped scratch file, `band_height` rows at a time"""
+        pyvips = _load_pyvips()
+        if pyvips is None:
+            logger.warning("pyvips is not installed: decoding the whole page instead of streaming it")
+            return cls.from_bytes(image_bytes)
+        try:
+            image = pyvips.Image.new_from_buffer(image_bytes, "", access="sequential")
+        except pyvips.Error as e:
+            logger.warning(f"pyvips could not open the image ({e}), decoding the whole page instead")
+            return cls.from_bytes(image_bytes)
+
+        # Same pixels as cv2.IMREAD_COLOR: EXIF orientation applied, sRGB, 8-bit, 3 channels, alpha dropped
+        orientation = image.get("orientation") if image.get_typeof("orientation") else 1
+        if orientation not in (0, 1):
+            # Rotation needs random access; libvips decodes large images to a temp file for that
+            image = pyvips.Image.new_from_buffer(image_bytes, "", access="random").autorot()
+        if image.interpretation == "cmyk":
+            # OpenCV's own CMYK -> RGB (inverted Adobe CMYK, as libjpeg returns it), not a colour-managed
+            # conversion, so a streamed page has the same pixels as the same page decoded whole
+            k = 255 - image[3]
+            image = (k - ((image[:3].cast("int") * k) >> 8)).cast("uchar")
+        elif image.interpretation != "srgb":
+            image = image.colourspace("srgb")
+        if image.format != "uchar":
+            image = image.cast("uchar")
+        if image.bands > 3:
+            image = image[:3]
+
+        width, height = image.width, image.height
+        logger.info(f"Processing image: {width}x{height} (streaming, {band_height}px bands)")
+
+        # Unlinked on creation: the space is freed once the mapping is released
+        scratch = tempfile.TemporaryFile(dir=STREAMING_SCRATCH_DIR)
+        bgr = np.memmap(scratch, dtype=np.uint8, mode="w+", shape=(height, width, 3))
+
+        # Sequential access: bands are fetched top to bottom, each one written straight to scratch
+        region = pyvips.Region.new(image)
+        for y in range(0, height, band_height):
+            rows = min(band_height, height - y)
+            band = np.frombuffer(region.fetch(0, y, width, rows), dtype=np.uint8).reshape(rows, width, 3)
+            bgr[y:y + rows] = band[..., ::-1]
+        return cls(bgr)
+
+    @property
+    def streamed(self) -> bool:
+        return isinstance(self.bgr, np.memmap)
+
+    @property
+    def height(self) -> int:
+        return self.bgr.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.bgr.shape[1]
+
+    def view(self, x: int, y: int, w: int, h: int) -> np.ndarray:
+        """BGR view of a box (clipped to the page), sharing the page buffer"""
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(self.width, x + w), min(self.height, y + h)
+        return self.bgr[y1:max(y1, y2), x1:max(x1, x2)]
+
+    def crop(self, x: int, y: int, w: int, h: int) -> Image.Image:
+        """RGB PIL crop of a box; the only copy made is the crop itself"""
+        roi = self.view(x, y, w, h)
+        if roi.size == 0:
+            return Image.new('RGB', (1, 1), 'white')
+        return Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
+
+    def crop_boxes(self, boxes: List[Tuple[int, int, int, int]]) -> List[Image.Image]:
+        """Crops of (x, y, w, h) boxes, in order"""
+        return [self.crop(x, y, w, h) for x, y, w, h in boxes]
@@ -0,0 +1,132 @@
+"""
+Hedged Execution
+Run a primary engine and, if it hasn't produced a good result after a delay, a backup engine in parallel.
+The first good result wins and the other attempt is cancelled (work already running in a worker
+finishes in the background and is ignored). Per-engine wins and latency percentiles are kept for
+tuning the delay.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(ordered: list, pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return round(ordered[k], 1)
+
+
+class HedgeStats:
+    """Winning engine and end-to-end latency of recent hedged jobs"""
+
+    def __init__(self, window: int = 500):
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._page_latencies = deque(maxlen=window)
+        self._wins: Dict[str, int] = defaultdict(int)
+        self.jobs = 0
+        self.hedged = 0  # jobs where the backup engine was started
+        self._lock = threading.Lock()
+
+    def record(self, winner: Optional[str], latency_ms: float, hedged: bool):
+        with self._lock:
+            self.jobs += 1
+            self.hedged += int(hedged)
+            self._page_latencies.append(latency_ms)
+            if winner is not None:
+                self._wins[winner] += 1
+                self._latencies[winner].append(latency_ms)
+
+    @staticmethod
+    def _summary(values) -> dict:
+        ordered = sorted(values)
+        return {"p50_ms": _percentile(ordered, 50), "p95_ms": _percentile(ordered, 95), "p99_ms": _percentile(ordered, 99)}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "jobs": self.jobs,
+                "hedged": self.hedged,
+                "page_latency": self._summary(self._page_latencies),
+                "engines": {
+                    engine: {
+                        "wins": wins,
+                        "win_rate": round(wins / self.jobs, 3) if self.jobs else 0.0,
+                        **self._summary(self._latencies[engine]),
+                    }
+                    for engine, wins in self._wins.items()
+                },
+            }
+
+
+async def run_hedged(
+    primary: Tuple[str, Callable[[], Awaitable]],
+    backup: Tuple[str, Callable[[], Awaitable]],
+    delay: float,
+    is_good: Callable[[Any], bool],
+) -> Tuple[str, Any, bool]:
+    """
+    Start primary; start backup once `delay` seconds pass without a good primary result
+    (immediately if primary fails or returns a bad result first).
+
+    Returns (engine name, result, whether backup was started). If no attempt is good, the backup's
+    result is returned (or its error raised), like a plain sequential fallback.
+    """
+    names = {}
+    primary_task = asyncio.ensure_future(primary[1]())
+    names[primary_task] = primary[0]
+    pending = {primary_task}
+    outcomes: Dict[str, Tuple[bool, Any]] = {}  # name -> (ok, result or exception)
+    backup_started = False
+
+    def start_backup():
+        nonlocal backup_started
+        task = asyncio.ensure_future(backup[1]())
+        names[task] = backup[0]
+        pending.add(task)
+        backup_started = True
+
+    try:
+        while pending:
+            timeout = delay if not backup_started else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"⏱️ [Hedge] {primary[0]} pending after {delay:.1f}s, starting {backup[0]}")
+                start_backup()
+                continue
+
+            for task in done:
+                pending.discard(task)
+                name = names[task]
+                error = task.exception()
+                if error is None and is_good(task.result()):
+                    return name, task.result(), backup_started
+                outcomes[name] = (error is None, task.result() if error is None else error)
+
+            if not backup_started:
+                start_backup()
+    finally:
+        # Loser (or everything, if we were cancelled): stop waiting on it
+        for task in pending:
+            task.cancel()
+
+    ok, value = outcomes[backup[0]]
+    if not ok:
+        raise value
+    return backup[0], value, backup_started
+
+
+# Singleton instance
+_hedge_stats: Optional[HedgeStats] = None
+
+
+def get_hedge_stats() -> HedgeStats:
+    global _hedge_stats
+    if _hedge_stats is None:
+        _hedge_stats = HedgeStats()
+    return _hedge_stats
@@ -0,0 +1,179 @@
+"""
+Shared HTTP Client
+One app-lifetime httpx.AsyncClient (keep-alive pool, optional HTTP/2) for outbound provider calls, with
+per-provider limits:
+1. Concurrency semaphore
+2. Token-bucket rate limiter
+3. Retry with jittered exponential backoff on 429 / 5xx / transport errors (honours Retry-After);
+   non-idempotent requests are only retried when they never reached the server
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Errors raised before the request was sent: safe to retry even a non-idempotent request
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ProviderLimiter:
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 8,
+        rate: float = 10.0,
+        burst: int = 10,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._bucket = TokenBucket(rate, burst)
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after", "")
+            if retry_after.replace(".", "", 1).isdigit():
+                return min(float(retry_after), self.backoff_max)
+        # Full jitter: spreads retries of a burst instead of retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, url: str, idempotent: bool = True, **kwargs
+    ) -> httpx.Response:
+        """
+        Send one request within this provider's limits; returns the last response or raises the last error.
+        idempotent=False (e.g. a POST creating a task): no retry once the server may have received it.
+        """
+        attempt = 0
+        while True:
+            response = None
+            error = None
+            async with self._semaphore:
+                await self._bucket.acquire()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    error = e
+
+            if error is None and response.status_code not in RETRY_STATUSES:
+                return response
+            if not idempotent and not isinstance(error, NOT_SENT_ERRORS):
+                if error is not None:
+                    raise error
+                return response
+            if attempt >= self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self._backoff(attempt, response)
+            reason = error or f"HTTP {response.status_code}"
+            logger.warning(f"🔄 [{self.name}] {reason}, retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+def _env_number(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+# Singleton instances
+_http_client: Optional[httpx.AsyncClient] = None
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("HTTP2", "false").lower() != "true":
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP2=true but the h2 package is not installed, using HTTP/1.1")
+        return False
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """App-lifetime pooled client (created on first use inside the running event loop)"""
+    global _http_client
+    if _http_client is None:
+        max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+        _http_client = httpx.AsyncClient(
+            http2=_http2_enabled(),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30")),
+            ),
+        )
+    return _http_client
+
+
+def get_provider_limiter(provider: str) -> ProviderLimiter:
+    """
+    Limits for one provider, from <PROVIDER>_CONCURRENCY, <PROVIDER>_RATE_PER_SEC,
+    <PROVIDER>_BURST and <PROVIDER>_MAX_RETRIES
+    """
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        prefix = provider.upper()
+        limiter = ProviderLimiter(
+            provider,
+            concurrency=int(_env_number(f"{prefix}_CONCURRENCY", 8)),
+            rate=_env_number(f"{prefix}_RATE_PER_SEC", 10),
+            burst=int(_env_number(f"{prefix}_BURST", 10)),
+            max_retries=int(_env_number(f"{prefix}_MAX_RETRIES", 3)),
+        )
+        _limiters[provider] = limiter
+    return limiter
+
+
+async def provider_request(provider: str, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+    """Send a request to `provider` through the shared client and its limits (see ProviderLimiter.request)"""
+    return await get_provider_limiter(provider).request(get_http_client(), method, url, idempotent, **kwargs)
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _limiters.clear()
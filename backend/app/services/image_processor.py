@@ -9,10 +9,15 @@ Advanced pipeline for:
 import cv2
 import numpy as np
 import logging
-from typing import List, Tuple, Dict, Optional
-from PIL import Image
-import io
+from typing import Callable, List, Tuple, Dict, Optional
+import itertools
+import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.box_dedup import MODES as DEDUP_MODES, dedup_boxes
+from app.services.decoded_page import DecodedPage, should_stream
 
 logger = logging.getLogger(__name__)
 
@@ -21,263 +26,529 @@ class MangaProcessor:
         self.use_yolo = use_yolo
         # Thresholds can be adjusted here
         self.slice_height = 2000  # Height of each slice for long images
-        self.overlap = 500        # Overlap to prevent splitting bubbles
-        self.iou_threshold = 0.3  # Intersection over Union for NMS
+        self.overlap = 500        # Overlap to prevent splitting bubbles (upper bound in seam mode)
+        # Seam mode: small overlap sized from the bubbles seen so far, boxes cut at a seam are stitched
+        self.seam_stitching = os.getenv("SLICE_SEAMS", "true").lower() == "true"
+        self.seam_initial_overlap = 256  # Overlap until enough bubbles have been seen
+        self.seam_min_overlap = 48
+        # Overlap = this share of the tall (p95) bubble height: a bubble cut by a seam then shows at least
+        # this share in one of the two slices, enough for the detector to find both parts
+        self.seam_overlap_ratio = 0.35
+        self.seam_tolerance = 8          # Box edge within this many px of a seam counts as cut by it
+        self.iou_threshold = 0.3  # Overlap above which a box is suppressed
+        # Box deduplication: compat (original suppression), iou or containment
+        self.dedup_mode = os.getenv("BOX_DEDUP_MODE", "compat").lower()
+        if self.dedup_mode not in DEDUP_MODES:
+            logger.warning(f"Unknown BOX_DEDUP_MODE '{self.dedup_mode}', using compat")
+            self.dedup_mode = "compat"
+        # Slice planning: "gutter" skips blank spans and cuts slices inside gutters, "fixed" covers the page
+        self.slice_planner = os.getenv("SLICE_PLANNER", "gutter").lower()
+        self.gutter_min_height = 64   # Blank run at least this tall (px) counts as a gutter
+        self.gutter_margin = 24       # Blank pixels kept around each content span
+        self.gutter_row_std = 4.0     # Max gray-level std of a row that still counts as blank
+        self.planner_width = 128      # Width of the downscaled copy profiled by the planner
+        # Number of slices sent to YOLOv8 per forward pass (1 = one call per slice)
+        self.detection_batch_size = int(os.getenv("DETECTION_BATCH_SIZE", "8"))
+        self.inpaint_padding = 10  # Pixels around each box included in its inpainting ROI
+        
+        # Threads inpainting disjoint ROIs concurrently (cv2 releases the GIL; 1 = sequential)
+        self.inpaint_threads = int(os.getenv("INPAINT_THREADS", "4"))
+        self._inpaint_executor = None
+        
+        # Mask-building objects reused across ROIs and pages
+        # (CLAHE keeps internal buffers, so each inpainting thread gets its own)
+        self._thread_local = threading.local()
+        self._kernel_close = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2, 2))
+        self._kernel_dilate = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2, 2))
+        
+    def cache_signature(self) -> Dict:
+        """Detector/inpainting settings that affect pipeline output (part of result cache keys)"""
+        from app.services.bubble_detector_service import DETECTOR_BACKEND, DETECTOR_INT8
+
+        return {
+            'detector_backend': DETECTOR_BACKEND,
+            'detector_int8': DETECTOR_INT8,
+            'use_yolo': self.use_yolo,
+            'slice_height': self.slice_height,
+            'overlap': self.overlap,
+            'iou_threshold': self.iou_threshold,
+            'slice_planner': self.slice_planner,
+            'seam_stitching': self.seam_stitching,
+            'dedup_mode': self.dedup_mode,
+        }
         
-    def process(self, image_bytes: bytes, progress_callback=None) -> Tuple[List[Dict], np.ndarray]:
+    def process(self, image, progress_callback=None, event_callback=None) -> Tuple[List[Dict], np.ndarray]:
         """
         Main pipeline:
-        1. Read Image
+        1. Read Image (bytes, or an already decoded DecodedPage)
         2. Detect Text (Sliding Window)
         3. Clean Image (Surgical Inpainting)
         4. Return Regions & Cleaned Image
+        
+        event_callback(event, data), if given, receives partial results:
+        "slice_regions" after each detection batch and "regions" once boxes are final.
         """
+        # 1. Load Image
+        page = self.decode_page(image, progress_callback)
+
+        # 2-3. Detect Text with Sliding Window + Deduplicate (NMS)
+        regions, final_boxes = self.detect_regions(page.bgr, progress_callback, event_callback)
+
+        # 4. Surgical Inpainting (Clean Text)
+        # A page decoded here is ours to clean in place (no full-page copy, also for streamed pages)
+        cleaned_img = self.clean(page.bgr, final_boxes, progress_callback, in_place=page is not image)
+        
+        return regions, cleaned_img
+
+    def decode_page(self, image, progress_callback=None) -> DecodedPage:
+        """
+        Decode once; every later stage works on views of the returned page.
+        Very tall pages are decoded in slice_height bands into a memory-mapped scratch file.
+        """
+        if isinstance(image, DecodedPage):
+            return image
         if progress_callback:
             progress_callback(5, "Đang đọc ảnh...")
+        if should_stream(image):
+            return DecodedPage.from_bytes_streaming(image, band_height=self.slice_height)
+        return DecodedPage.from_bytes(image)
 
-        # 1. Load Image
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if img_bgr is None:
-            raise ValueError("Could not decode image")
-            
-        full_h, full_w = img_bgr.shape[:2]
-        logger.info(f"Processing image: {full_w}x{full_h}")
+    def clean(self, img_bgr: np.ndarray, boxes: List[Tuple], progress_callback=None, in_place: bool = False) -> np.ndarray:
+        """
+        Surgical inpainting of the detected boxes.
+        in_place=True cleans img_bgr itself instead of a full-page copy (take OCR crops first).
+        """
+        if progress_callback:
+            progress_callback(50, f"Đang tẩy {len(boxes)} vùng text...")
+        return self._surgical_inpainting(img_bgr, boxes, progress_callback, in_place=in_place)
 
+    def detect_regions(self, img_bgr: np.ndarray, progress_callback=None, event_callback=None) -> Tuple[List[Dict], List[Tuple]]:
+        """
+        Sliding window detection + NMS.
+        Returns (region dicts with ids, final (x, y, w, h) boxes), both top-to-bottom.
+        """
         if progress_callback:
             progress_callback(10, "Đang chia nhỏ ảnh (Sliding Window)...")
 
-        # 2. Detect Text with Sliding Window
-        raw_boxes = self._sliding_window_detection(img_bgr, progress_callback)
+        raw_boxes = self._sliding_window_detection(img_bgr, progress_callback, event_callback)
         
         if progress_callback:
             progress_callback(40, "Đang lọc trùng lặp (NMS)...")
 
-        # 3. Deduplicate (NMS)
+        # Deduplicate (NMS)
         final_boxes = self._non_max_suppression(raw_boxes)
         # Sort top-to-bottom
         final_boxes.sort(key=lambda b: b[1]) 
         
         logger.info(f"Detected {len(final_boxes)} unique text regions")
 
-        if progress_callback:
-            progress_callback(50, f"Đang tẩy {len(final_boxes)} vùng text...")
-
-        # 4. Surgical Inpainting (Clean Text)
-        cleaned_img = self._surgical_inpainting(img_bgr, final_boxes, progress_callback)
-        
-        # 5. Format Results
+        # Region ids are assigned before inpainting so they can be streamed early
         regions = []
         for x, y, w, h in final_boxes:
             regions.append({
                 'id': f'region-{uuid.uuid4().hex[:8]}',
                 'bounding_box': {'x': x, 'y': y, 'width': w, 'height': h}
             })
-            
-        return regions, cleaned_img
+        if event_callback:
+            event_callback("regions", {"regions": regions})
+        
+        return regions, final_boxes
 
-    def _sliding_window_detection(self, img: np.ndarray, progress_callback=None) -> List[Tuple[int, int, int, int]]:
+    def _iter_slices(self, spans: List[Tuple[int, int]], overlap: Callable[[], int]):
         """
-        Slice image into overlapping chunks and detect text in each.
-        Returns list of (x, y, w, h) in global coordinates.
+        Yield (y_start, y_end, seam_top, seam_bottom) slices covering each span.
+        overlap() is read before each cut, so it can adapt while earlier slices are detected.
+        seam_top / seam_bottom mark slice edges that cut through content (not a span edge).
+        """
+        for span_start, span_end in spans:
+            y = span_start
+            while y < span_end:
+                y_end = min(y + self.slice_height, span_end)
+                yield y, y_end, y > span_start, y_end < span_end
+                if y_end == span_end:
+                    break
+                y = y_end - min(overlap(), self.slice_height // 2)
+
+    def _content_spans(self, img: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        (y_start, y_end) spans that hold content, found on a downscaled copy:
+        rows whose gray-level std stays under gutter_row_std are blank, and blank runs of at least
+        gutter_min_height px are gutters. Spans keep gutter_margin px of blank around them.
         """
         h, w = img.shape[:2]
-        boxes = []
-        
+        # Narrow width, full row resolution (1/4 on very tall pages): cheap, and thin gutters stay visible.
+        # Profiled band by band, so a streamed page is never read (or resized) whole
+        scale = 4 if h > 8000 else 1
+        band_h = max(scale, self.slice_height // scale * scale)
+        small_w = min(w, self.planner_width)
+        profile = []
+        for y in range(0, h, band_h):
+            band = img[y:y + band_h]
+            small_h = -(-band.shape[0] // scale)
+            small = cv2.resize(band, (small_w, small_h), interpolation=cv2.INTER_AREA)
+            profile.append(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).std(axis=1))
+        row_std = np.concatenate(profile) if profile else np.zeros(0)
+
+        blank = np.concatenate(([False], row_std < self.gutter_row_std, [False]))
+        edges = np.flatnonzero(np.diff(blank.astype(np.int8)))
+        starts, ends = edges[0::2], edges[1::2]  # blank runs [start, end) in small rows
+        min_rows = self.gutter_min_height / scale
+
+        spans = []
         y = 0
-        total_steps = h // (self.slice_height - self.overlap) + 1
-        current_step = 0
+        for start, end in zip(starts, ends):
+            if end - start < min_rows:
+                continue
+            gutter_start, gutter_end = int(start * scale), min(h, int(end * scale))
+            if gutter_start > y:
+                spans.append((y, gutter_start))
+            y = gutter_end
+        if y < h:
+            spans.append((y, h))
+
+        margin = self.gutter_margin
+        return [(max(0, y1 - margin), min(h, y2 + margin)) for y1, y2 in spans if y2 > y1]
+
+    def plan_spans(self, img: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Vertical spans to slice independently, per slice_planner.
+        "gutter": content spans packed while they fit in slice_height, so cuts between spans fall inside
+        gutters (spans taller than a slice are cut with overlap); "fixed": the whole page.
+        """
+        h = img.shape[0]
+        if self.slice_planner != "gutter":
+            return [(0, h)] if h > 0 else []
+
+        spans = []
+        for y1, y2 in self._content_spans(img):
+            if spans and y2 - spans[-1][0] <= self.slice_height:
+                spans[-1] = (spans[-1][0], y2)
+            else:
+                spans.append((y1, y2))
+
+        covered = sum(y2 - y1 for y1, y2 in spans)
+        logger.info(f"Slice planner: {len(spans)} content spans, {(h - covered) / max(h, 1) * 100:.1f}% of rows skipped")
+        return spans
+
+    def _slice_overlap(self, bubble_heights: List[int]) -> int:
+        """Overlap for the next cut: fixed without seam stitching, else sized from the bubbles seen"""
+        if not self.seam_stitching:
+            return self.overlap
+        if len(bubble_heights) < 3:
+            return self.seam_initial_overlap
+        tall = float(np.percentile(bubble_heights, 95))
+        return int(np.clip(tall * self.seam_overlap_ratio, self.seam_min_overlap, self.overlap))
+
+    def plan_slices(self, img: np.ndarray) -> List[Tuple[int, int]]:
+        """Detection slices for a page before any bubble is seen (seam overlap may adapt during detection)"""
+        overlap = self._slice_overlap([])
+        return [(y, y_end) for y, y_end, _, _ in self._iter_slices(self.plan_spans(img), lambda: overlap)]
+
+    def _stitch_seams(self, slice_results: List[Tuple]) -> List[Tuple[int, int, int, int]]:
+        """
+        Merge boxes cut by a seam: a box touching a slice's top seam and a box of the previous slice
+        reaching down to it, overlapping horizontally, become their union (repeatedly, for tall bubbles).
+        When several previous boxes qualify, the best aligned one is used.
+        This also replaces the cut copy of a bubble that the previous slice saw whole.
+        slice_results: (y_start, y_end, seam_top, seam_bottom, global boxes) in slice order.
+        """
+        tol = self.seam_tolerance
+        out: List[Optional[Tuple[int, int, int, int]]] = []
+        carried: List[int] = []  # Indexes in out of the previous slice's boxes (when it ends at a seam)
+
+        for y, y_end, seam_top, seam_bottom, boxes in slice_results:
+            next_carried = []
+            for box in boxes:
+                x, by, w, h = box
+                if seam_top and by <= y + tol:
+                    # Of the carried boxes that qualify, merge with the best aligned one:
+                    # largest share of horizontal overlap, then smallest vertical gap
+                    best, best_score = None, None
+                    for idx in carried:
+                        other = out[idx]
+                        if other is None:
+                            continue
+                        cx, cy, cw, ch = other
+                        x_overlap = min(x + w, cx + cw) - max(x, cx)
+                        if x_overlap >= 0.5 * min(w, cw) and cy + ch >= y - tol and by <= cy + ch + tol:
+                            score = (x_overlap / max(1, min(w, cw)), -abs(by - (cy + ch)))
+                            if best_score is None or score > best_score:
+                                best, best_score = idx, score
+                    if best is not None:
+                        cx, cy, cw, ch = out[best]
+                        x1, y1 = min(x, cx), min(by, cy)
+                        x2, y2 = max(x + w, cx + cw), max(by + h, cy + ch)
+                        box = (x1, y1, x2 - x1, y2 - y1)
+                        out[best] = None
+                out.append(box)
+                if seam_bottom:
+                    next_carried.append(len(out) - 1)
+            carried = next_carried
+
+        return [box for box in out if box is not None]
+
+    def _sliding_window_detection(self, img: np.ndarray, progress_callback=None, event_callback=None) -> List[Tuple[int, int, int, int]]:
+        """
+        Slice image into overlapping chunks and detect text in each.
+        Slices go through YOLOv8 in batches of `detection_batch_size`;
+        slices where YOLOv8 finds nothing fall back to classic detectors.
+        In seam mode the overlap adapts to the bubble heights seen in earlier batches and
+        boxes cut at slice seams are stitched back together.
+        Returns list of (x, y, w, h) in global coordinates.
+        """
+        spans = self.plan_spans(img)
+        total_rows = sum(y2 - y1 for y1, y2 in spans)
+        if total_rows == 0:
+            return []
+
+        # Heights of boxes not cut by a seam, for sizing the next overlaps
+        bubble_heights: List[int] = []
+        slices = self._iter_slices(spans, lambda: self._slice_overlap(bubble_heights))
+        batch_size = max(1, self.detection_batch_size)
+        slice_results = []
+
+        while True:
+            batch = list(itertools.islice(slices, batch_size))
+            if not batch:
+                break
+            first = len(slice_results) + 1
 
-        while y < h:
-            current_step += 1
             if progress_callback:
-                pct = 10 + int((current_step / total_steps) * 30) # 10% -> 40%
-                progress_callback(pct, f"Đang quét phần {current_step}/{int(total_steps)}...")
+                scanned = sum(min(y2, batch[-1][1]) - y1 for y1, y2 in spans if y1 < batch[-1][1])
+                pct = 10 + int(scanned / total_rows * 30) # 10% -> 40%
+                progress_callback(pct, f"Đang quét phần {first}-{first + len(batch) - 1}...")
 
-            # Calculate slice boundaries
-            y_end = min(y + self.slice_height, h)
-            
-            # Slice image
-            img_slice = img[y:y_end, :]
-            
-            # Run Detection on Slice
-            slice_boxes = self._detect_in_slice(img_slice)
+            # Slice image (numpy views, no copy)
+            img_slices = [img[y:y_end, :] for y, y_end, _, _ in batch]
+
+            # Run Detection on all slices of the batch at once
+            batch_boxes = self._detect_yolo_batch(img_slices)
+
+            for (y, y_end, seam_top, seam_bottom), img_slice, slice_boxes in zip(batch, img_slices, batch_boxes):
+                if not slice_boxes:
+                    slice_boxes = self._detect_fallback(img_slice)
+
+                # Adjust coordinates and add to list
+                global_boxes = [(int(sx), int(sy + y), int(sw), int(sh)) for sx, sy, sw, sh in slice_boxes]
+                slice_results.append((y, y_end, seam_top, seam_bottom, global_boxes))
+                bubble_heights.extend(
+                    bh for _, by, _, bh in global_boxes
+                    if not (seam_top and by <= y + self.seam_tolerance)
+                    and not (seam_bottom and by + bh >= y_end - self.seam_tolerance)
+                )
+
+                if event_callback:
+                    # Preview only: not yet deduplicated across overlapping slices
+                    event_callback("slice_regions", {
+                        "y_start": y,
+                        "y_end": y_end,
+                        "boxes": [{'x': bx, 'y': by, 'width': bw, 'height': bh} for bx, by, bw, bh in global_boxes],
+                    })
+
+        if self.seam_stitching:
+            return self._stitch_seams(slice_results)
+        return [box for *_, boxes in slice_results for box in boxes]
+
+    def _yolo_enabled(self) -> bool:
+        from app.services.bubble_detector_service import is_bubble_detector_available
+
+        yolo_available = is_bubble_detector_available()
+        logger.debug(f"YOLOv8 available: {yolo_available}, use_yolo: {self.use_yolo}")
+        return self.use_yolo and yolo_available
+
+    def _detect_yolo_batch(self, img_slices: List[np.ndarray]) -> List[List[Tuple[int, int, int, int]]]:
+        """Run YOLOv8 on several slices in batched forward passes (empty lists if unavailable)"""
+        empty = [[] for _ in img_slices]
+        
+        try:
+            if not self._yolo_enabled():
+                return empty
             
-            # Adjust coordinates and add to list
-            for sx, sy, sw, sh in slice_boxes:
-                global_y = sy + y
-                boxes.append((int(sx), int(global_y), int(sw), int(sh)))
+            from app.services.bubble_detector_service import detect_speech_bubbles_batch
             
-            if y_end == h:
-                break
-            y += (self.slice_height - self.overlap)
+            logger.debug(f"Batched YOLOv8 on {len(img_slices)} slices")
+            results = detect_speech_bubbles_batch(
+                img_slices,
+                confidence_threshold=0.3,
+                batch_size=self.detection_batch_size
+            )
+            return [[(r[0], r[1], r[2], r[3]) for r in slice_results] for slice_results in results]
             
-        return boxes
+        except Exception as yolo_err:
+            logger.warning(f"YOLOv8 batch detection failed: {yolo_err}")
+            return empty
 
-    def _detect_in_slice(self, img_slice: np.ndarray) -> List[Tuple[int, int, int, int]]:
-        """Run YOLOv8 or fallback detection on a single slice"""
+    def _detect_fallback(self, img_slice: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Classic detectors for slices where YOLOv8 found nothing"""
         boxes = []
-        slice_h, slice_w = img_slice.shape[:2]
-        print(f"👉 [Detect] Processing slice: {slice_w}x{slice_h}")
         
         try:
-            # Try YOLOv8 from our service
-            from app.services.bubble_detector_service import detect_speech_bubbles, is_bubble_detector_available
-            
-            yolo_available = is_bubble_detector_available()
-            print(f"👉 [Detect] YOLOv8 available: {yolo_available}, use_yolo: {self.use_yolo}")
-            
-            if self.use_yolo and yolo_available:
-                try:
-                    results = detect_speech_bubbles(img_slice, confidence_threshold=0.3)
-                    boxes = [(r[0], r[1], r[2], r[3]) for r in results]
-                    print(f"👉 [Detect] YOLOv8 found {len(boxes)} bubbles")
-                except Exception as yolo_err:
-                    print(f"❌ [Detect] YOLOv8 error: {yolo_err}")
-                
-            if not boxes:
-                # Fallback 1: White region detection
-                print("👉 [Detect] Trying white region fallback...")
-                from app.services.manga_ocr_service import detect_white_regions
-                boxes = detect_white_regions(img_slice)
-                print(f"👉 [Detect] White region found {len(boxes)} regions")
+            # Fallback 1: White region detection
+            logger.debug("Trying white region fallback...")
+            from app.services.manga_ocr_service import detect_white_regions
+            boxes = detect_white_regions(img_slice)
+            logger.debug(f"White region found {len(boxes)} regions")
                 
             if not boxes:
                 # Fallback 2: Text contour detection (dark text on light bg)
-                print("👉 [Detect] Trying text contour fallback...")
+                logger.debug("Trying text contour fallback...")
                 from app.services.manga_ocr_service import detect_text_contours
                 boxes = detect_text_contours(img_slice)
-                print(f"👉 [Detect] Text contour found {len(boxes)} regions")
+                logger.debug(f"Text contour found {len(boxes)} regions")
                 
         except Exception as e:
-            print(f"❌ [Detect] Critical error in slice: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Fallback detection failed in slice: {e}")
             
-        print(f"👉 [Detect] Final boxes from slice: {len(boxes)}")
         return boxes
 
 
-    def _non_max_suppression(self, boxes: List[Tuple], threshold: float = 0.3) -> List[Tuple]:
+    def _non_max_suppression(self, boxes: List[Tuple]) -> List[Tuple]:
         """
-        Merge overlapping boxes using Malisiewicz et al. method.
+        Deduplicate boxes from overlapping slices / fallback detectors (see box_dedup for the modes).
         boxes: List of (x, y, w, h)
         """
-        if not boxes:
-            return []
-            
-        # Convert to specific format for NMS: (x1, y1, x2, y2)
-        # x, y, w, h -> x1, y1, x2, y2
-        b_array = np.array(boxes).astype(float)
+        return dedup_boxes(boxes, self.dedup_mode, self.iou_threshold)
+
+    def _plan_inpaint_rois(self, boxes: List[Tuple], img_shape: Tuple) -> List[List[Tuple[int, int, int, int, float]]]:
+        """
+        Pad every box into its own (x1, y1, x2, y2, max_component_area) ROI, then group ROIs that overlap.
+        Within a group ROIs keep the order of `boxes` and must be cleaned one after another (each one reads
+        the pixels the previous ones cleaned); ROIs of different groups share no pixel.
+        Returns the groups, top to bottom.
+        """
+        img_h, img_w = img_shape[:2]
+        pad = self.inpaint_padding
         
-        if len(boxes) == 0:
-            return []
-            
-        pick = []
+        rois = []
+        for x, y, w, h in boxes:
+            # Padding with boundary checks
+            x1 = max(0, x - pad)
+            y1 = max(0, y - pad)
+            x2 = min(img_w, x + w + pad)
+            y2 = min(img_h, y + h + pad)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            # Ignore components covering the entire bubble (likely error)
+            rois.append((x1, y1, x2, y2, (w * h) * 0.9))
         
-        x1 = b_array[:, 0]
-        y1 = b_array[:, 1]
-        x2 = b_array[:, 0] + b_array[:, 2]
-        y2 = b_array[:, 1] + b_array[:, 3]
+        # Union-find over overlapping ROIs, sweeping top to bottom
+        parent = list(range(len(rois)))
         
-        area = (x2 - x1 + 1) * (y2 - y1 + 1)
-        idxs = np.argsort(y2)
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
         
-        while len(idxs) > 0:
-            last = idxs.shape[0] - 1
-            i = idxs[last]
-            pick.append(i)
-            
-            xx1 = np.maximum(x1[i], x1[idxs[:last]])
-            yy1 = np.maximum(y1[i], y1[idxs[:last]])
-            xx2 = np.minimum(x2[i], x2[idxs[:last]])
-            yy2 = np.minimum(y2[i], y2[idxs[:last]])
-            
-            w = np.maximum(0, xx2 - xx1 + 1)
-            h = np.maximum(0, yy2 - yy1 + 1)
-            
-            overlap = (w * h) / area[idxs[:last]]
-            
-            idxs = np.delete(idxs, np.concatenate(([last], np.where(overlap > threshold)[0])))
-            
-        return [boxes[i] for i in pick]
+        active: List[int] = []
+        for i in sorted(range(len(rois)), key=lambda i: rois[i][1]):
+            x1, y1, x2, _, _ = rois[i]
+            active = [j for j in active if rois[j][3] > y1]
+            for j in active:
+                if x1 < rois[j][2] and rois[j][0] < x2:
+                    parent[find(j)] = find(i)
+            active.append(i)
+        
+        groups: Dict[int, List[Tuple[int, int, int, int, float]]] = {}
+        for i, roi in enumerate(rois):
+            groups.setdefault(find(i), []).append(roi)
+        return sorted(groups.values(), key=lambda g: min((r[1], r[0]) for r in g))
 
-    def _surgical_inpainting(self, img: np.ndarray, boxes: List[Tuple], progress_callback=None) -> np.ndarray:
+    def _get_clahe(self):
+        clahe = getattr(self._thread_local, 'clahe', None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._thread_local.clahe = clahe
+        return clahe
+
+    def _build_text_mask(self, roi: np.ndarray, max_area: float) -> np.ndarray:
         """
-        Remove ONLY text pixels using advanced adaptive masking.
-        Preserves background art and bubble borders.
+        Advanced adaptive masking of text pixels inside one ROI.
+        Components are filtered with a label lookup table in one vectorized pass.
         """
-        cleaned = img.copy()
-        total_boxes = len(boxes)
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
         
-        for idx, (x, y, w, h) in enumerate(boxes):
-            if progress_callback and idx % 5 == 0:
-                pct = 50 + int((idx / total_boxes) * 40) # 50% -> 90%
-                progress_callback(pct, f"Đang tẩy vùng {idx+1}/{total_boxes}...")
+        # CLAHE (Contrast Limited Adaptive Histogram Equalization)
+        # Improves contrast before thresholding, helping with faded text
+        enhanced_gray = self._get_clahe().apply(gray)
+        
+        # Adaptive Thresholding (Gaussian)
+        # Better than Otsu for varying lighting conditions within a bubble
+        mask = cv2.adaptiveThreshold(
+            enhanced_gray, 
+            255, 
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            cv2.THRESH_BINARY_INV, 
+            15, # Block size (must be odd)
+            10  # C constant
+        )
+        
+        # Noise Filtering (Connected Components)
+        # Remove tiny specks that are likely noise, not text
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        
+        # Text characters usually have area > 15-20 pixels;
+        # ignore components covering the entire bubble (likely error)
+        min_area = 15
+        areas = stats[:, cv2.CC_STAT_AREA]
+        keep = (areas > min_area) & (areas < max_area)
+        keep[0] = False  # Background
+        
+        lut = np.where(keep, 255, 0).astype(np.uint8)
+        clean_mask = lut[labels]
+        
+        # Refine Mask
+        # Close small holes inside characters
+        clean_mask = cv2.morphologyEx(clean_mask, cv2.MORPH_CLOSE, self._kernel_close)
+        
+        # Dilate MINIMALLY to cover anti-aliasing pixels around text
+        # iterations=1 and small kernel to avoid expanding into bubble border
+        return cv2.dilate(clean_mask, self._kernel_dilate, iterations=1)
 
-            # 1. Padding with boundary checks
-            pad = 10
-            x1 = max(0, x - pad)
-            y1 = max(0, y - pad)
-            x2 = min(img.shape[1], x + w + pad)
-            y2 = min(img.shape[0], y + h + pad)
-            
-            roi = cleaned[y1:y2, x1:x2]
-            if roi.size == 0: continue
-            
-            # 2. Advanced Adaptive Masking
-            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-            
-            # CLAHE (Contrast Limited Adaptive Histogram Equalization)
-            # Improves contrast before thresholding, helping with faded text
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            enhanced_gray = clahe.apply(gray)
-            
-            # Adaptive Thresholding (Gaussian)
-            # Better than Otsu for varying lighting conditions within a bubble
-            mask = cv2.adaptiveThreshold(
-                enhanced_gray, 
-                255, 
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY_INV, 
-                15, # Block size (must be odd)
-                10  # C constant
-            )
-            
-            # 3. Noise Filtering (Connected Components)
-            # Remove tiny specks that are likely noise, not text
-            num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
-            
-            # Create a clean mask
-            clean_mask = np.zeros_like(mask)
-            
-            # Filter components based on area
-            # Text characters usually have area > 15-20 pixels
-            min_area = 15  
-            max_area = (w * h) * 0.9 # Ignore if it covers the entire bubble (likely error)
-            
-            for i in range(1, num_labels): # Skip background (label 0)
-                area = stats[i, cv2.CC_STAT_AREA]
-                if min_area < area < max_area:
-                    clean_mask[labels == i] = 255
-            
-            # 4. Refine Mask
-            # Close small holes inside characters
-            kernel_close = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2, 2))
-            clean_mask = cv2.morphologyEx(clean_mask, cv2.MORPH_CLOSE, kernel_close)
-            
-            # Dilate MINIMALLY to cover anti-aliasing pixels around text
-            # iterations=1 and small kernel to avoid expanding into bubble border
-            kernel_dilate = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2, 2))
-            dilated_mask = cv2.dilate(clean_mask, kernel_dilate, iterations=1)
+    def _clean_group(self, img: np.ndarray, group: List[Tuple]):
+        """
+        Mask + inpaint the ROIs of one group in order, writing into img.
+        Only touches the group's own pixels, so different groups can run in parallel.
+        """
+        for x1, y1, x2, y2, max_area in group:
+            roi = img[y1:y2, x1:x2]
+            dilated_mask = self._build_text_mask(roi, max_area)
             
-            # 5. Inpaint
+            # Inpaint
             # Navier-Stokes (INPAINT_NS) often preserves gradients better than Telea for larger areas
             # But Telea is sharper for thin text. Let's stick to Telea for text.
-            inpainted_roi = cv2.inpaint(roi, dilated_mask, 3, cv2.INPAINT_TELEA)
-            
-            # Restore ROI
-            cleaned[y1:y2, x1:x2] = inpainted_roi
+            img[y1:y2, x1:x2] = cv2.inpaint(roi, dilated_mask, 3, cv2.INPAINT_TELEA)
+
+    def _get_inpaint_executor(self) -> ThreadPoolExecutor:
+        if self._inpaint_executor is None:
+            self._inpaint_executor = ThreadPoolExecutor(
+                max_workers=self.inpaint_threads, thread_name_prefix="inpaint"
+            )
+        return self._inpaint_executor
+
+    def _surgical_inpainting(self, img: np.ndarray, boxes: List[Tuple], progress_callback=None, in_place: bool = False) -> np.ndarray:
+        """
+        Remove ONLY text pixels using advanced adaptive masking.
+        Preserves background art and bubble borders.
+        Each box is masked and inpainted over its own padded ROI, in box order, exactly like
+        one-box-at-a-time cleaning; groups of overlapping ROIs run concurrently on `inpaint_threads` threads.
+        in_place=True writes into img (safe: groups are disjoint).
+        """
+        cleaned = img if in_place else img.copy()
+        groups = self._plan_inpaint_rois(boxes, img.shape)
+        total_boxes = sum(len(group) for group in groups)
+        
+        if self.inpaint_threads > 1 and len(groups) > 1:
+            done = self._get_inpaint_executor().map(lambda group: self._clean_group(cleaned, group), groups)
+        else:
+            done = (self._clean_group(cleaned, group) for group in groups)
+        
+        cleaned_boxes = 0
+        for idx, (group, _) in enumerate(zip(groups, done)):
+            if progress_callback and idx % 5 == 0:
+                pct = 50 + int((cleaned_boxes / total_boxes) * 40) # 50% -> 90%
+                progress_callback(pct, f"Đang tẩy vùng {cleaned_boxes + 1}/{total_boxes}...")
+            cleaned_boxes += len(group)
             
         return cleaned
 
@@ -0,0 +1,191 @@
+"""
+Cleaned Image Store
+Content-addressed storage for cleaned pages, served as binary by /api/ocr/images/{image_id}:
+1. Master copy stored once as lossless PNG (memory LRU + disk tier)
+2. Encoded variants (PNG level, lossless WebP, JPEG/WebP quality) made on demand
+   and kept in the memory LRU only
+"""
+
+import base64
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.services.cache_tiers import DiskTier, MemoryLRU
+from app.services.decoded_page import _load_pyvips
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+# Same quality scripts/process-chapter.ts uses for chapter pages
+DEFAULT_QUALITY = 80
+
+# libwebp limit per side; long webtoon strips exceed it
+WEBP_MAX_DIMENSION = 16383
+
+
+def encode_image(
+    img: np.ndarray,
+    fmt: str = "png",
+    quality: int = DEFAULT_QUALITY,
+    compression: int = 1,
+    lossless: bool = False
+) -> bytes:
+    """
+    Encode a BGR image.
+    png: compression 0-9 (1 = fastest), webp: quality 1-100 or lossless, jpeg: quality 1-100
+    Raises ValueError for unknown formats, images the format cannot hold, and encoder failures.
+    """
+    if fmt == "png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, compression]
+        ext = ".png"
+    elif fmt == "webp":
+        h, w = img.shape[:2]
+        if max(h, w) > WEBP_MAX_DIMENSION:
+            raise ValueError(f"WebP supports at most {WEBP_MAX_DIMENSION}px per side, image is {w}x{h}")
+        # OpenCV switches WebP to lossless for quality > 100
+        params = [cv2.IMWRITE_WEBP_QUALITY, 101 if lossless else quality]
+        ext = ".webp"
+    elif fmt == "jpeg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        ext = ".jpg"
+    else:
+        raise ValueError(f"Unknown image format '{fmt}', expected one of {tuple(FORMATS)}")
+
+    ok, buffer = cv2.imencode(ext, img, params)
+    if not ok:
+        raise ValueError(f"Failed to encode image as {fmt}")
+    return buffer.tobytes()
+
+
+def encode_png(img: np.ndarray, compression: int = 1) -> bytes:
+    """
+    Lossless PNG master of a BGR page.
+    Streamed pages (memory-mapped) are encoded by pyvips, which reads the scratch file row by row
+    instead of OpenCV touching the whole page at once; same pixels either way.
+    """
+    pyvips = _load_pyvips()
+    if isinstance(img, np.memmap) and pyvips is not None:
+        h, w = img.shape[:2]
+        bgr = pyvips.Image.new_from_memory(img, w, h, 3, "uchar")
+        rgb = bgr[2].bandjoin([bgr[1], bgr[0]])
+        return rgb.write_to_buffer(".png", compression=compression)
+    return encode_image(img, "png", compression=compression)
+
+
+def make_data_url(mime: str, data: bytes) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+def variant_name(fmt: str, quality: int, compression: int, lossless: bool) -> str:
+    """Short, stable name of one encoding (part of the ETag)"""
+    if fmt == "png":
+        return f"png-c{compression}"
+    if fmt == "webp" and lossless:
+        return "webp-lossless"
+    return f"{fmt}-q{quality}"
+
+
+class ImageStore:
+    def __init__(
+        self,
+        max_memory_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        png_compression: int = 1,
+    ):
+        self.png_compression = png_compression
+        self._memory = MemoryLRU(max_memory_bytes)
+        self._disk = DiskTier(disk_dir, ".png", max_disk_bytes, name="Image store") if disk_dir else None
+
+    @staticmethod
+    def make_id(png: bytes) -> str:
+        return hashlib.sha256(png).hexdigest()[:32]
+
+    # --- Masters ---
+
+    def put(self, png: bytes) -> str:
+        """Store an encoded PNG master once; returns its content id"""
+        image_id = self.make_id(png)
+        self._memory.put(image_id, png)
+        if self._disk and image_id not in self._disk:
+            self._disk.write(image_id, png)
+        return image_id
+
+    def get(self, image_id: str) -> Optional[bytes]:
+        """PNG master (memory first, then disk) or None"""
+        data = self._memory.get(image_id)
+        if data is not None:
+            return data
+
+        data = self._disk.read(image_id) if self._disk else None
+        if data is not None:
+            self._memory.put(image_id, data)
+        return data
+
+    def __contains__(self, image_id: str) -> bool:
+        if image_id in self._memory:
+            return True
+        return bool(self._disk and image_id in self._disk)
+
+    # --- Variants ---
+
+    def get_variant(
+        self,
+        image_id: str,
+        fmt: str = "png",
+        quality: int = DEFAULT_QUALITY,
+        compression: Optional[int] = None,
+        lossless: bool = False
+    ) -> Optional[Tuple[bytes, str]]:
+        """Encoded bytes + variant name for one output format, or None if the image is unknown"""
+        if compression is None:
+            compression = self.png_compression
+        variant = variant_name(fmt, quality, compression, lossless)
+
+        # The master already is this variant
+        if fmt == "png" and compression == self.png_compression:
+            master = self.get(image_id)
+            return (master, variant) if master is not None else None
+
+        key = f"{image_id}.{variant}"
+        data = self._memory.get(key)
+        if data is not None:
+            return data, variant
+
+        master = self.get(image_id)
+        if master is None:
+            return None
+
+        img = cv2.imdecode(np.frombuffer(master, np.uint8), cv2.IMREAD_COLOR)
+        data = encode_image(img, fmt, quality=quality, compression=compression, lossless=lossless)
+        self._memory.put(key, data)
+        return data, variant
+
+
+def get_png_compression() -> int:
+    return int(os.getenv("CLEANED_PNG_COMPRESSION", "1"))
+
+
+# Singleton instance
+_image_store = None
+
+
+def get_image_store() -> ImageStore:
+    global _image_store
+    if _image_store is None:
+        disk_dir = os.getenv("OCR_IMAGE_STORE_DIR", str(Path(__file__).parent / "cache" / "images"))
+        _image_store = ImageStore(
+            max_memory_bytes=int(os.getenv("OCR_IMAGE_MEMORY_MB", "256")) * 1024 * 1024,
+            disk_dir=disk_dir or None,
+            max_disk_bytes=int(os.getenv("OCR_IMAGE_DISK_MB", "2048")) * 1024 * 1024,
+            png_compression=get_png_compression(),
+        )
+        logger.info(f"Cleaned image store ready (disk: {disk_dir or 'disabled'})")
+    return _image_store
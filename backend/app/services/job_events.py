@@ -0,0 +1,85 @@
+"""
+Job Event Broker
+Fan-out of job progress and partial results to streaming (SSE) subscribers.
+publish() is thread-safe: pipeline threads and the worker-pool listener call it directly.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Events kept per running job so late subscribers can catch up on partial results
+HISTORY_LIMIT = 500
+
+TERMINAL_EVENTS = ("completed", "failed")
+
+Event = Tuple[str, dict]
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: "asyncio.Queue[Optional[Event]]" = asyncio.Queue()
+
+    def push(self, item: Optional[Event]):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+
+class JobEventBroker:
+    def __init__(self):
+        self._subscribers: Dict[str, List[_Subscriber]] = {}
+        self._history: Dict[str, Deque[Event]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, event: str, data: dict):
+        item = (event, data)
+        with self._lock:
+            history = self._history.setdefault(job_id, deque(maxlen=HISTORY_LIMIT))
+            history.append(item)
+            subscribers = list(self._subscribers.get(job_id, ()))
+
+        for subscriber in subscribers:
+            subscriber.push(item)
+
+        if event in TERMINAL_EVENTS:
+            self.close(job_id)
+
+    def close(self, job_id: str):
+        """Job finished: end every stream and drop its history"""
+        with self._lock:
+            subscribers = self._subscribers.pop(job_id, [])
+            self._history.pop(job_id, None)
+
+        for subscriber in subscribers:
+            subscriber.push(None)
+
+    def subscribe(self, job_id: str) -> Tuple[_Subscriber, List[Event]]:
+        """Register a subscriber on the running loop; returns it with the events published so far"""
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(subscriber)
+            backlog = list(self._history.get(job_id, ()))
+        return subscriber, backlog
+
+    def unsubscribe(self, job_id: str, subscriber: _Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers and subscriber in subscribers:
+                subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+
+# Singleton instance
+_event_broker = None
+
+
+def get_event_broker() -> JobEventBroker:
+    global _event_broker
+    if _event_broker is None:
+        _event_broker = JobEventBroker()
+    return _event_broker
@@ -0,0 +1,316 @@
+"""
+OCR Job Store
+Bounded storage for async OCR jobs:
+1. MemoryJobStore - in-process dict with TTL + total-bytes budget
+2. SQLiteJobStore - jobs in SQLite (survives restarts, keeps worker memory flat)
+Cleaned images live in the image store; results only carry their URL.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("completed", "failed")
+
+
+def _record_size(job: Dict) -> int:
+    """Approximate bytes held by a job record"""
+    return _result_size(job.get("result"))
+
+
+def _result_size(result: Optional[Dict]) -> int:
+    return len(json.dumps(result)) if result is not None else 0
+
+
+class JobStore(ABC):
+    """
+    Interface for job storage.
+    Records are plain dicts: job_id, status, progress, message, result (dict), error, created_at.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_bytes: int = 512 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._last_purge = 0.0
+
+    @abstractmethod
+    def create(self, job_id: str, **fields) -> Dict:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def update(self, job_id: str, **fields):
+        ...
+
+    @abstractmethod
+    def delete(self, job_id: str):
+        ...
+
+    @abstractmethod
+    def purge(self):
+        """Drop expired jobs and enforce the bytes budget"""
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def _maybe_purge(self):
+        # Purging scans the store; do it at most every few seconds
+        now = time.time()
+        if now - self._last_purge > 5:
+            self._last_purge = now
+            self.purge()
+
+    @staticmethod
+    def _new_record(job_id: str, fields: Dict) -> Dict:
+        now = time.time()
+        record = {
+            "job_id": job_id,
+            "status": "pending",
+            "progress": 0,
+            "message": "",
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        record.update(fields)
+        return record
+
+
+class MemoryJobStore(JobStore):
+    def __init__(self, ttl_seconds: float = 3600, max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(ttl_seconds, max_bytes)
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+
+    def create(self, job_id: str, **fields) -> Dict:
+        self._maybe_purge()
+        record = self._new_record(job_id, fields)
+        with self._lock:
+            self._jobs[job_id] = record
+            self._account(job_id)
+        return dict(record)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if self._expired(job):
+                self._remove(job_id)
+                return None
+            return dict(job)
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job["updated_at"] = time.time()
+            if "result" in fields:
+                self._account(job_id)
+        if "result" in fields:
+            # Chapter jobs rewrite their result on every page event: purge on the timer, not per write
+            self._maybe_purge()
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._remove(job_id)
+
+    def purge(self):
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items() if self._expired(job)]:
+                self._remove(job_id)
+
+            # Over budget: drop the oldest finished jobs first
+            if self._total_bytes > self.max_bytes:
+                for job_id in [j for j, job in self._jobs.items() if job["status"] in FINISHED_STATES]:
+                    if self._total_bytes <= self.max_bytes:
+                        break
+                    logger.info(f"Job store over budget, evicting job {job_id}")
+                    self._remove(job_id)
+
+    def _expired(self, job: Dict) -> bool:
+        return time.time() - job["updated_at"] > self.ttl_seconds
+
+    def _account(self, job_id: str):
+        size = _record_size(self._jobs[job_id])
+        self._total_bytes += size - self._sizes.get(job_id, 0)
+        self._sizes[job_id] = size
+
+    def _remove(self, job_id: str):
+        self._jobs.pop(job_id, None)
+        self._total_bytes -= self._sizes.pop(job_id, 0)
+
+
+class SQLiteJobStore(JobStore):
+    def __init__(self, directory: str, ttl_seconds: float = 3600, max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(ttl_seconds, max_bytes)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.directory / "jobs.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL,
+                message TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                result_size INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "result_size" not in columns:
+            # Stores created when cleaned images were kept as blobs next to the database
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN result_size INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at)")
+
+        # Jobs that were running when the process died will never finish
+        self._conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart' "
+            "WHERE status NOT IN ('completed', 'failed')"
+        )
+        self._conn.commit()
+
+    def create(self, job_id: str, **fields) -> Dict:
+        self._maybe_purge()
+        record = self._new_record(job_id, fields)
+        result = record.pop("result")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, status, progress, message, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, record["status"], record["progress"], record["message"],
+                 record["error"], record["created_at"], record["updated_at"]),
+            )
+            self._conn.commit()
+        if result is not None:
+            self.update(job_id, result=result)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, status, progress, message, result, error, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        job_id, status, progress, message, result_json, error, created_at, updated_at = row
+        if time.time() - updated_at > self.ttl_seconds:
+            self.delete(job_id)
+            return None
+
+        result = json.loads(result_json) if result_json else None
+
+        return {
+            "job_id": job_id,
+            "status": status,
+            "progress": progress,
+            "message": message,
+            "result": result,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def update(self, job_id: str, **fields):
+        columns = {k: fields[k] for k in ("status", "progress", "message", "error") if k in fields}
+
+        if "result" in fields:
+            result = fields["result"]
+            columns["result"] = json.dumps(result) if result is not None else None
+            columns["result_size"] = _result_size(result)
+
+        if not columns:
+            return
+        columns["updated_at"] = time.time()
+
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                (*columns.values(), job_id),
+            )
+            self._conn.commit()
+
+        if "result" in fields:
+            # Chapter jobs rewrite their result on every page event: purge on the timer, not per write
+            self._maybe_purge()
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def purge(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [r[0] for r in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,)
+            )]
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(result_size), 0) FROM jobs WHERE updated_at >= ?", (cutoff,)
+            ).fetchone()[0]
+
+            # Over budget: drop the oldest finished jobs first
+            evicted = []
+            if total > self.max_bytes:
+                for job_id, size in self._conn.execute(
+                    "SELECT job_id, result_size FROM jobs WHERE updated_at >= ? "
+                    "AND status IN ('completed', 'failed') ORDER BY updated_at",
+                    (cutoff,),
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append(job_id)
+                    total -= size
+
+        for job_id in expired + evicted:
+            self.delete(job_id)
+
+
+# Singleton instance
+_job_store = None
+
+
+def get_job_store() -> JobStore:
+    global _job_store
+    if _job_store is None:
+        backend = os.getenv("OCR_JOB_STORE", "memory").lower()
+        ttl_seconds = float(os.getenv("OCR_JOB_TTL_SECONDS", "3600"))
+        max_bytes = int(os.getenv("OCR_JOB_STORE_MB", "512")) * 1024 * 1024
+
+        if backend == "sqlite":
+            directory = os.getenv("OCR_JOB_STORE_DIR", str(Path(__file__).parent / "cache" / "jobs"))
+            _job_store = SQLiteJobStore(directory, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        else:
+            _job_store = MemoryJobStore(ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+
+        logger.info(f"OCR job store: {backend} (ttl={ttl_seconds:.0f}s, budget={max_bytes // (1024 * 1024)}MB)")
+    return _job_store
@@ -0,0 +1,94 @@
+"""
+Local Pipeline
+Sliding Window Detection + Surgical Inpainting + MangaOCR as one CPU-bound task.
+Takes and returns plain (picklable) data so it can run in a worker process.
+"""
+
+import logging
+from typing import Callable, List, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def ocr_region_crops(
+    crops: List[Image.Image],
+    region_dicts: List[dict],
+    event_callback: Optional[Callable[[str, dict], None]] = None
+) -> List[dict]:
+    """
+    OCR detected regions (crops of the original page, one per region) in batches.
+    Regions without recognized text are dropped.
+    Each finished batch is reported as an "ocr" event if event_callback is given.
+    """
+    from app.services.manga_ocr_service import recognize_manga_text_batch
+
+    def with_text(regions: List[dict], texts: List[str]) -> List[dict]:
+        return [
+            {
+                'id': r['id'],
+                'text': text,
+                'confidence': 90.0,
+                'bounding_box': r['bounding_box'],
+            }
+            for r, text in zip(regions, texts)
+            if text
+        ]
+
+    chunk_callback = None
+    if event_callback:
+        def chunk_callback(start: int, chunk_texts: List[str]):
+            chunk_regions = region_dicts[start:start + len(chunk_texts)]
+            event_callback("ocr", {"regions": with_text(chunk_regions, chunk_texts)})
+
+    texts = recognize_manga_text_batch(crops, chunk_callback=chunk_callback)
+    return with_text(region_dicts, texts)
+
+
+def run_local_pipeline(
+    contents: bytes,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    event_callback: Optional[Callable[[str, dict], None]] = None
+) -> dict:
+    """
+    Detect, clean and OCR one page.
+    Partial results (detected regions, OCR text per batch) go to event_callback.
+
+    Returns:
+        {"regions": [region dicts with text], "cleaned_png": PNG bytes}
+    """
+    from app.services.image_processor import get_manga_processor
+    from app.services.image_store import encode_png, get_png_compression
+
+    processor = get_manga_processor()
+
+    # 1. Decode once: detection and inpainting use this buffer, OCR uses crops of it
+    page = processor.decode_page(contents, progress_callback)
+
+    # 2. Detect (with progress updates 10-40%)
+    region_dicts, boxes = processor.detect_regions(page.bgr, progress_callback, event_callback)
+
+    # OCR needs original pixels (OCR on cleaned image would be empty!): bubble-sized crops are taken
+    # now, so the page can be cleaned in place instead of in a full-page copy
+    crops = page.crop_boxes(boxes)
+
+    # 3. Clean (50-90%)
+    cleaned_img_cv = processor.clean(page.bgr, boxes, progress_callback, in_place=True)
+
+    # 4. OCR on Original Crops
+    # Runs before encoding so recognized text can be streamed as early as possible
+    if progress_callback:
+        progress_callback(90, "Đang OCR từng vùng...")
+    regions = ocr_region_crops(crops, region_dicts, event_callback)
+
+    # 5. Finalize
+    if progress_callback:
+        progress_callback(95, "Đang mã hóa ảnh kết quả...")
+    # Lossless master; other formats are encoded on demand by the image endpoint
+    cleaned_png = encode_png(cleaned_img_cv, get_png_compression())
+
+    return {
+        "regions": regions,
+        "cleaned_png": cleaned_png,
+    }
@@ -0,0 +1,236 @@
+"""
+Local Translation Engine
+Offline CPU machine translation for /api/translate/batch:
+1. Marian (Helsinki-NLP opus-mt) model per language pair, NLLB-200 for every other pair
+2. Converted once to CTranslate2 (int8 by default) and run with batched, length-sorted inference
+3. Loaded lazily per language pair; models idle for LOCAL_MT_IDLE_SECONDS are unloaded
+   (on use, and by a background sweep started with the app so an idle server frees them too)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Keyed by LANG_MAP codes (routers/translation.py)
+MARIAN_MODELS = {
+    ("ja", "en"): "Helsinki-NLP/opus-mt-ja-en",
+    ("ja", "vi"): "Helsinki-NLP/opus-mt-ja-vi",
+    ("ko", "en"): "Helsinki-NLP/opus-mt-ko-en",
+    ("zh-CN", "en"): "Helsinki-NLP/opus-mt-zh-en",
+    ("zh-TW", "en"): "Helsinki-NLP/opus-mt-zh-en",
+    ("zh-CN", "vi"): "Helsinki-NLP/opus-mt-zh-vi",
+    ("en", "vi"): "Helsinki-NLP/opus-mt-en-vi",
+    ("vi", "en"): "Helsinki-NLP/opus-mt-vi-en",
+}
+
+NLLB_MODEL = os.getenv("LOCAL_MT_NLLB_MODEL", "facebook/nllb-200-distilled-600M")
+NLLB_CODES = {
+    "ja": "jpn_Jpan",
+    "ko": "kor_Hang",
+    "zh-CN": "zho_Hans",
+    "zh-TW": "zho_Hant",
+    "en": "eng_Latn",
+    "vi": "vie_Latn",
+}
+
+CT2_DIR = Path(__file__).parent / "models" / "ct2"
+
+
+def resolve_model(from_lang: str, to_lang: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """(model name, NLLB source code, NLLB target code) for a pair; raises ValueError if unsupported"""
+    model_name = MARIAN_MODELS.get((from_lang, to_lang))
+    if model_name:
+        return model_name, None, None
+    if from_lang in NLLB_CODES and to_lang in NLLB_CODES and from_lang != to_lang:
+        return NLLB_MODEL, NLLB_CODES[from_lang], NLLB_CODES[to_lang]
+    raise ValueError(f"No local translation model for {from_lang} -> {to_lang}")
+
+
+class LocalTranslator:
+    def __init__(
+        self,
+        model_name: str,
+        src_code: Optional[str] = None,
+        compute_type: str = "int8",
+        threads: int = 0,
+        beam_size: int = 2,
+        max_batch_size: int = 32,
+    ):
+        import ctranslate2
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.beam_size = beam_size
+        self.max_batch_size = max_batch_size
+
+        model_dir = self._convert(model_name, compute_type)
+        self.translator = ctranslate2.Translator(
+            str(model_dir), device="cpu", compute_type=compute_type, intra_threads=threads
+        )
+        if src_code:
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name, src_lang=src_code)
+        else:
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    @staticmethod
+    def _convert(model_name: str, compute_type: str) -> Path:
+        """Convert to CTranslate2 once into app/services/models/ct2, then reuse"""
+        model_dir = CT2_DIR / f"{model_name.replace('/', '--')}-{compute_type}"
+        if (model_dir / "model.bin").exists():
+            return model_dir
+
+        from ctranslate2.converters import TransformersConverter
+
+        logger.info(f"🔄 Converting {model_name} to CTranslate2 ({compute_type}, first run only)...")
+        TransformersConverter(model_name).convert(str(model_dir), quantization=compute_type, force=True)
+        logger.info(f"✅ CTranslate2 model saved to: {model_dir}")
+        return model_dir
+
+    def translate_batch(self, texts: List[str], tgt_code: Optional[str] = None) -> List[str]:
+        """
+        Translate in length-sorted batches (less padding per batch); returns texts in input order.
+        tgt_code: NLLB target language, forced as the first decoded token
+        """
+        if not texts:
+            return []
+
+        tokens = [self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text)) for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: len(tokens[i]))
+
+        results = self.translator.translate_batch(
+            [tokens[i] for i in order],
+            target_prefix=[[tgt_code]] * len(order) if tgt_code else None,
+            max_batch_size=self.max_batch_size,
+            beam_size=self.beam_size,
+        )
+
+        translated: List[str] = [""] * len(texts)
+        for i, result in zip(order, results):
+            hypothesis = result.hypotheses[0]
+            if tgt_code:
+                hypothesis = hypothesis[1:]  # Drop the forced target language token
+            ids = self.tokenizer.convert_tokens_to_ids(hypothesis)
+            translated[i] = self.tokenizer.decode(ids, skip_special_tokens=True)
+        return translated
+
+
+class LocalTranslationEngines:
+    """Per-pair LocalTranslator instances, loaded on first use and unloaded when idle"""
+
+    def __init__(self, idle_seconds: float = 900, max_models: int = 2):
+        self.idle_seconds = idle_seconds
+        self.max_models = max(1, max_models)
+        # Background sweep: an idle model is unloaded at most this long after it expires
+        self.sweep_interval = max(1.0, min(60.0, idle_seconds / 4))
+        self._sweep_task: Optional[asyncio.Task] = None
+        # model name -> (translator, last used)
+        self._models: Dict[str, Tuple[LocalTranslator, float]] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, model_name: str, src_code: Optional[str] = None) -> LocalTranslator:
+        # NLLB serves many pairs; one instance per source language (its tokenizer is source-specific)
+        key = f"{model_name}:{src_code}" if src_code else model_name
+
+        self.evict_idle()
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models[key] = (entry[0], time.monotonic())
+                return entry[0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other pairs keep translating meanwhile
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    return entry[0]
+
+            logger.info(f"🔄 Loading local translation model {model_name}...")
+            translator = LocalTranslator(
+                model_name,
+                src_code,
+                compute_type=os.getenv("LOCAL_MT_COMPUTE_TYPE", "int8"),
+                threads=int(os.getenv("LOCAL_MT_THREADS", "0")),
+                beam_size=int(os.getenv("LOCAL_MT_BEAM_SIZE", "2")),
+                max_batch_size=int(os.getenv("LOCAL_MT_BATCH_SIZE", "32")),
+            )
+            logger.info(f"✅ Local translation model {model_name} loaded")
+            with self._lock:
+                self._models[key] = (translator, time.monotonic())
+                self._evict_over_limit()
+            return translator
+
+    def translate(self, from_lang: str, to_lang: str, texts: List[str]) -> List[str]:
+        model_name, src_code, tgt_code = resolve_model(from_lang, to_lang)
+        return self.get(model_name, src_code).translate_batch(texts, tgt_code)
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, (_, used) in self._models.items() if now - used > self.idle_seconds]:
+                logger.info(f"Unloading idle local translation model {key}")
+                del self._models[key]
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                # Dropping a model releases its memory; keep that off the event loop
+                await asyncio.to_thread(self.evict_idle)
+            except Exception as e:
+                logger.error(f"Local translation idle sweep failed: {e}")
+
+    def start(self):
+        if self._sweep_task is None or self._sweep_task.done():
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+
+    def _evict_over_limit(self):
+        """Keep at most max_models loaded, least recently used go first (caller holds lock)"""
+        while len(self._models) > self.max_models:
+            key = min(self._models, key=lambda k: self._models[k][1])
+            logger.info(f"Unloading local translation model {key} (LOCAL_MT_MAX_MODELS)")
+            del self._models[key]
+
+    def loaded_models(self) -> List[str]:
+        with self._lock:
+            return list(self._models)
+
+
+def is_local_translation_available() -> bool:
+    try:
+        import ctranslate2
+        import transformers
+        return True
+    except ImportError:
+        return False
+
+
+# Singleton instance
+_engines = None
+
+
+def get_local_translation_engines() -> LocalTranslationEngines:
+    global _engines
+    if _engines is None:
+        _engines = LocalTranslationEngines(
+            idle_seconds=float(os.getenv("LOCAL_MT_IDLE_SECONDS", "900")),
+            max_models=int(os.getenv("LOCAL_MT_MAX_MODELS", "2")),
+        )
+    return _engines
@@ -0,0 +1,107 @@
+"""
+Manga OCR Engine
+Optimized CPU inference for manga-ocr behind one recognize API, with selectable profiles:
+1. fp32 - stock PyTorch model
+2. int8 - dynamic int8 quantization of the decoder Linear layers
+3. onnx - ONNX-exported encoder/decoder (optimum + ONNX Runtime) with KV-cache reuse
+
+Every run uses torch.inference_mode and batched greedy decoding.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MANGA_OCR_MODEL = "kha-white/manga-ocr-base"
+PROFILES = ("fp32", "int8", "onnx")
+
+# Same limit MangaOcr.__call__ uses
+MAX_LENGTH = 300
+
+
+class MangaOcrEngine:
+    def __init__(self, profile: str = "fp32", model_name: str = MANGA_OCR_MODEL):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown manga-ocr profile '{profile}', expected one of {PROFILES}")
+
+        import torch
+        from transformers import AutoTokenizer
+
+        self.profile = profile
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.processor = self._load_processor(model_name)
+
+        if profile == "onnx":
+            self.model = self._load_onnx(model_name)
+        else:
+            from transformers import VisionEncoderDecoderModel
+
+            model = VisionEncoderDecoderModel.from_pretrained(model_name)
+            model.eval()
+            if profile == "int8":
+                # Decoder Linear layers dominate autoregressive decoding cost on CPU
+                model.decoder = torch.ao.quantization.quantize_dynamic(
+                    model.decoder, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            self.model = model
+
+    @staticmethod
+    def _load_processor(model_name: str):
+        try:
+            from transformers import ViTImageProcessor
+            return ViTImageProcessor.from_pretrained(model_name)
+        except ImportError:
+            # Older transformers releases
+            from transformers import AutoFeatureExtractor
+            return AutoFeatureExtractor.from_pretrained(model_name)
+
+    @staticmethod
+    def _load_onnx(model_name: str):
+        """Export once to app/services/models/manga-ocr-onnx, then load from there"""
+        from optimum.onnxruntime import ORTModelForVision2Seq
+
+        export_dir = Path(__file__).parent / "models" / "manga-ocr-onnx"
+        if (export_dir / "config.json").exists():
+            return ORTModelForVision2Seq.from_pretrained(export_dir, use_cache=True)
+
+        logger.info("🔄 Exporting manga-ocr to ONNX (first run only)...")
+        model = ORTModelForVision2Seq.from_pretrained(model_name, export=True, use_cache=True)
+        model.save_pretrained(export_dir)
+        logger.info(f"✅ manga-ocr ONNX model saved to: {export_dir}")
+        return model
+
+    def recognize_batch(self, images: List[Image.Image]) -> List[str]:
+        """One batched encoder pass + batched greedy decoding; returns post-processed text per image"""
+        import torch
+        from manga_ocr.ocr import post_process
+
+        if not images:
+            return []
+
+        # Same normalisation MangaOcr.__call__ applies to a single image
+        images = [image.convert('L').convert('RGB') for image in images]
+        pixel_values = self.processor(images, return_tensors="pt").pixel_values
+
+        with torch.inference_mode():
+            token_ids = self.model.generate(
+                pixel_values.to(self.model.device),
+                max_length=MAX_LENGTH,
+                num_beams=1,
+                do_sample=False,
+                use_cache=True,
+            )
+
+        decoded = self.tokenizer.batch_decode(token_ids.cpu(), skip_special_tokens=True)
+        return [post_process(text).strip() for text in decoded]
+
+    def __call__(self, image: Image.Image) -> str:
+        return self.recognize_batch([image])[0]
+
+
+def get_profile_from_env() -> str:
+    return os.getenv("MANGA_OCR_PROFILE", "fp32").lower()
@@ -0,0 +1,80 @@
+"""
+Model Warmup
+Eager loading + dummy forward passes for the bubble detector and manga-ocr,
+and the load state reported by /ready.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: load and warm models at startup instead of on the first request
+EAGER_LOAD_MODELS = os.getenv("EAGER_LOAD_MODELS", "false").lower() == "true"
+
+# { model_name: { "state": "not_loaded|loading|ready|failed|unavailable", "load_ms", "warmup_ms", "error" } }
+_model_state: Dict[str, dict] = {}
+_state_lock = threading.Lock()
+
+
+def _set_state(name: str, **fields):
+    with _state_lock:
+        _model_state.setdefault(name, {}).update(fields)
+
+
+def _warm(name: str, is_available, warmup_fn):
+    if not is_available():
+        _set_state(name, state="unavailable")
+        return
+
+    _set_state(name, state="loading", error=None)
+    try:
+        timings = warmup_fn()
+        _set_state(name, state="ready", **timings)
+        logger.info(f"✅ {name} warm (load {timings['load_ms']}ms, warmup {timings['warmup_ms']}ms)")
+    except Exception as e:
+        _set_state(name, state="failed", error=str(e))
+        logger.error(f"❌ {name} warmup failed: {e}")
+
+
+def mark_warmup_pending():
+    """Report models as loading until a scheduled warmup finishes (so /ready fails meanwhile)"""
+    for name in ("bubble_detector", "manga_ocr"):
+        _set_state(name, state="loading")
+
+
+def warmup_models() -> Dict[str, dict]:
+    """Load and warm every model in this process (blocking)"""
+    from app.services.bubble_detector_service import is_bubble_detector_available, warmup_bubble_detector
+    from app.services.manga_ocr_service import is_manga_ocr_available, warmup_manga_ocr
+
+    start = time.perf_counter()
+    _warm("bubble_detector", is_bubble_detector_available, warmup_bubble_detector)
+    _warm("manga_ocr", is_manga_ocr_available, warmup_manga_ocr)
+    logger.info(f"Model warmup finished in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    return get_model_state()
+
+
+def get_model_state() -> Dict[str, dict]:
+    """Load state of models in this process (lazily loaded models show up as 'ready' without timings)"""
+    from app.services.bubble_detector_service import is_bubble_detector_loaded
+    from app.services.manga_ocr_service import is_manga_ocr_loaded
+
+    with _state_lock:
+        state = {name: dict(fields) for name, fields in _model_state.items()}
+
+    for name, loaded in (("bubble_detector", is_bubble_detector_loaded()), ("manga_ocr", is_manga_ocr_loaded())):
+        entry = state.setdefault(name, {"state": "not_loaded"})
+        if loaded and entry["state"] in ("not_loaded", "loading"):
+            entry["state"] = "ready"
+
+    return state
+
+
+def models_ready(state: Dict[str, dict]) -> bool:
+    """Warm when nothing is still loading or failed (unavailable optional models don't block)"""
+    return all(entry.get("state") in ("ready", "unavailable") for entry in state.values())
@@ -0,0 +1,179 @@
+"""
+ONNX Runtime Bubble Detector
+CPU backend for comic-speech-bubble-detector:
+1. Export the YOLOv8 .pt model to ONNX once (optionally int8-quantized)
+2. Letterbox pre-processing + NMS post-processing without ultralytics/torch at inference time
+"""
+
+import ast
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LETTERBOX_COLOR = (114, 114, 114)  # Same padding value ultralytics uses
+
+
+def onnx_model_paths(pt_path: str) -> Tuple[Path, Path]:
+    """(fp32, int8) ONNX model paths next to the .pt file"""
+    pt_path = Path(pt_path)
+    return pt_path.with_suffix(".onnx"), pt_path.with_name(f"{pt_path.stem}.int8.onnx")
+
+
+def is_onnx_model_exported(pt_path: str, int8: bool = False) -> bool:
+    """The ONNX model can be loaded without ultralytics (int8 is quantized from the fp32 export if missing)"""
+    fp32_path, int8_path = onnx_model_paths(pt_path)
+    return fp32_path.exists() or (int8 and int8_path.exists())
+
+
+def export_onnx_model(pt_path: str, int8: bool = False, imgsz: int = 640) -> str:
+    """
+    Export the YOLOv8 model next to its .pt file (reused on later calls).
+    Returns path of the fp32 or int8 ONNX model.
+    """
+    pt_path = Path(pt_path)
+    fp32_path, int8_path = onnx_model_paths(pt_path)
+    if int8 and int8_path.exists():
+        return str(int8_path)
+
+    if not fp32_path.exists():
+        from ultralytics import YOLO
+
+        logger.info("🔄 Exporting bubble detector to ONNX...")
+        exported = YOLO(str(pt_path)).export(format="onnx", imgsz=imgsz, dynamic=True)
+        if Path(exported) != fp32_path:
+            os.replace(exported, fp32_path)
+        logger.info(f"✅ ONNX model exported to: {fp32_path}")
+
+    if not int8:
+        return str(fp32_path)
+
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("🔄 Quantizing ONNX bubble detector to int8...")
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QUInt8)
+        logger.info(f"✅ int8 model written to: {int8_path}")
+
+    return str(int8_path)
+
+
+class OnnxBubbleDetector:
+    def __init__(self, onnx_path: str, imgsz: int = 640, intra_op_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.names = self._read_class_names()
+
+    def _read_class_names(self) -> Dict[int, str]:
+        """ultralytics stores {id: name} as a string in the ONNX metadata"""
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        try:
+            return {int(k): v for k, v in ast.literal_eval(metadata.get("names", "{}")).items()}
+        except (ValueError, SyntaxError):
+            return {}
+
+    def _letterbox(self, img: np.ndarray) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+        """Resize keeping aspect ratio and pad to imgsz x imgsz; returns (image, ratio, (pad_x, pad_y))"""
+        h, w = img.shape[:2]
+        ratio = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+
+        if (new_w, new_h) != (w, h):
+            img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        pad_x = (self.imgsz - new_w) / 2
+        pad_y = (self.imgsz - new_h) / 2
+        top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+        left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+
+        return img, ratio, (left, top)
+
+    def _preprocess(self, images: List[np.ndarray]):
+        batch = np.empty((len(images), 3, self.imgsz, self.imgsz), dtype=np.float32)
+        meta = []
+        for i, img in enumerate(images):
+            boxed, ratio, pad = self._letterbox(img)
+            # BGR HWC uint8 -> RGB CHW float [0, 1]
+            batch[i] = boxed[:, :, ::-1].transpose(2, 0, 1) * (1.0 / 255.0)
+            meta.append((ratio, pad, img.shape[:2]))
+        return batch, meta
+
+    def _postprocess(
+        self,
+        output: np.ndarray,
+        meta: Tuple,
+        confidence_threshold: float,
+        iou_threshold: float
+    ) -> List[Tuple[int, int, int, int, float, str]]:
+        """Decode one (4 + num_classes, anchors) YOLOv8 head output into page boxes"""
+        ratio, (pad_x, pad_y), (img_h, img_w) = meta
+
+        preds = output.T  # (anchors, 4 + num_classes)
+        class_scores = preds[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(preds)), class_ids]
+
+        keep = scores > confidence_threshold
+        if not keep.any():
+            return []
+        preds, class_ids, scores = preds[keep], class_ids[keep], scores[keep]
+
+        # cx, cy, w, h (letterboxed) -> x1, y1, w, h (original image)
+        cx, cy, bw, bh = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+        x1 = np.clip((cx - bw / 2 - pad_x) / ratio, 0, img_w)
+        y1 = np.clip((cy - bh / 2 - pad_y) / ratio, 0, img_h)
+        x2 = np.clip((cx + bw / 2 - pad_x) / ratio, 0, img_w)
+        y2 = np.clip((cy + bh / 2 - pad_y) / ratio, 0, img_h)
+        xywh = np.stack([x1, y1, x2 - x1, y2 - y1], axis=1)
+
+        # Per-class NMS, like ultralytics' default (agnostic=False)
+        indices = cv2.dnn.NMSBoxesBatched(
+            xywh.tolist(), scores.tolist(), class_ids.tolist(), confidence_threshold, iou_threshold
+        )
+
+        bubbles = []
+        for i in np.array(indices).flatten():
+            x, y, w, h = xywh[i]
+            class_id = int(class_ids[i])
+            bubbles.append((int(x), int(y), int(w), int(h), float(scores[i]), self.names.get(class_id, "bubble")))
+        return bubbles
+
+    def predict(
+        self,
+        images: List[np.ndarray],
+        confidence_threshold: float = 0.5,
+        iou_threshold: float = 0.5
+    ) -> List[List[Tuple[int, int, int, int, float, str]]]:
+        """Run one batched forward pass; returns boxes per image in the ultralytics tuple format"""
+        if not images:
+            return []
+
+        batch, meta = self._preprocess(images)
+        outputs = self.session.run(None, {self.input_name: batch})[0]
+
+        return [
+            self._postprocess(outputs[i], meta[i], confidence_threshold, iou_threshold)
+            for i in range(len(images))
+        ]
+
+
+def is_onnx_runtime_available() -> bool:
+    try:
+        import onnxruntime
+        return True
+    except ImportError:
+        return False
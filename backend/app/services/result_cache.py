@@ -0,0 +1,121 @@
+"""
+OCR Result Cache
+Content-addressed cache for finished OCR jobs:
+1. In-memory LRU bounded by bytes
+2. Local disk tier (survives restarts)
+3. Single-flight: identical concurrent submissions share one in-flight job
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.services.cache_tiers import DiskTier, MemoryLRU
+
+logger = logging.getLogger(__name__)
+
+# Bump when the pipeline output format changes so stale entries are ignored
+CACHE_VERSION = 2
+
+
+class OCRResultCache:
+    def __init__(
+        self,
+        max_memory_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 2 * 1024 * 1024 * 1024,
+    ):
+        self._memory = MemoryLRU(max_memory_bytes)
+        self._disk = DiskTier(disk_dir, ".json", max_disk_bytes, name="Cache") if disk_dir else None
+        self._inflight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(contents: bytes, params: dict) -> str:
+        """Key = hash of image bytes + hash of pipeline parameters"""
+        image_hash = hashlib.sha256(contents).hexdigest()
+        params_json = json.dumps({"v": CACHE_VERSION, **params}, sort_keys=True, default=str)
+        params_hash = hashlib.sha256(params_json.encode("utf-8")).hexdigest()[:16]
+        return f"{image_hash}-{params_hash}"
+
+    # --- Lookup / Store ---
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return cached result dict (memory first, then disk) or None"""
+        data = self._memory.get(key)
+        if data is None:
+            data = self._disk.read(key) if self._disk else None
+            if data is None:
+                return None
+            # Promote to memory tier
+            self._memory.put(key, data)
+
+        try:
+            return json.loads(data)
+        except ValueError:
+            logger.warning(f"Corrupt cache entry {key}, dropping")
+            self.invalidate(key)
+            return None
+
+    def put(self, key: str, result: dict):
+        """Store a JSON-serializable result in both tiers"""
+        data = json.dumps(result).encode("utf-8")
+        self._memory.put(key, data)
+        if self._disk:
+            self._disk.write(key, data)
+
+    def invalidate(self, key: str):
+        self._memory.pop(key)
+        if self._disk:
+            self._disk.delete(key)
+
+    # --- Single-flight ---
+
+    def claim(self, key: str, job_id: str) -> Optional[str]:
+        """
+        Register job_id as the in-flight job for key.
+        Returns the already in-flight job id instead if there is one.
+        """
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                return existing
+            self._inflight[key] = job_id
+            return None
+
+    def take_over(self, key: str, stale_job_id: str, job_id: str) -> Optional[str]:
+        """
+        Replace a stale claim by job_id, atomically.
+        Returns the in-flight job id instead if the claim has meanwhile moved to another job.
+        """
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None and existing != stale_job_id:
+                return existing
+            self._inflight[key] = job_id
+            return None
+
+    def release(self, key: str):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+
+# Singleton instance
+_result_cache = None
+
+
+def get_result_cache() -> OCRResultCache:
+    global _result_cache
+    if _result_cache is None:
+        disk_dir = os.getenv("OCR_CACHE_DIR", str(Path(__file__).parent / "cache" / "ocr"))
+        _result_cache = OCRResultCache(
+            max_memory_bytes=int(os.getenv("OCR_CACHE_MEMORY_MB", "256")) * 1024 * 1024,
+            disk_dir=disk_dir or None,
+            max_disk_bytes=int(os.getenv("OCR_CACHE_DISK_MB", "2048")) * 1024 * 1024,
+        )
+        logger.info(f"OCR result cache ready (disk: {disk_dir or 'disabled'})")
+    return _result_cache
@@ -0,0 +1,57 @@
+"""
+Text Packing
+Join many short texts into one translation request and split the answer back:
+1. Greedy packing in order, bounded by the provider's max query size (UTF-8 bytes)
+2. Segment delimiter that MT engines pass through untouched
+3. Strict round-trip check - callers fall back to one request per text when it fails
+"""
+
+import re
+from typing import List, Optional
+
+# A line of pipes survives translation far better than punctuation or numbering
+DELIMITER = "\n|||\n"
+_SPLIT = re.compile(r"\s*\|\s*\|\s*\|\s*")
+
+
+def can_pack(text: str) -> bool:
+    """Texts that already contain the delimiter would break segmentation"""
+    return "|" not in text
+
+
+def pack_texts(texts: List[str], max_bytes: int) -> List[List[int]]:
+    """
+    Group text indexes (in order) so each joined group fits in max_bytes.
+    Texts that cannot be packed, or are too long to share a request, get a group of their own.
+    """
+    delimiter_bytes = len(DELIMITER.encode("utf-8"))
+    groups: List[List[int]] = []
+    current: List[int] = []
+    current_bytes = 0
+
+    for i, text in enumerate(texts):
+        size = len(text.encode("utf-8"))
+        if not can_pack(text) or size + delimiter_bytes > max_bytes:
+            groups.append([i])
+            continue
+        if current and current_bytes + delimiter_bytes + size > max_bytes:
+            groups.append(current)
+            current, current_bytes = [], 0
+        current_bytes += size + (delimiter_bytes if current else 0)
+        current.append(i)
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def join_texts(texts: List[str]) -> str:
+    return DELIMITER.join(texts)
+
+
+def split_packed(translated: str, count: int) -> Optional[List[str]]:
+    """Per-text translations, or None if the segmentation did not round-trip"""
+    parts = [part.strip() for part in _SPLIT.split(translated.strip())]
+    if len(parts) != count or any(not part for part in parts):
+        return None
+    return parts
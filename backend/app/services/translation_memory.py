@@ -0,0 +1,126 @@
+"""
+Translation Memory
+Exact-match store of finished translations, keyed by (normalized text, source, target, provider):
+1. In-process LRU front
+2. Local SQLite store (survives restarts, shared by every series / chapter)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str, str, str]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC (full/half-width forms) + collapsed whitespace, so trivially different OCR output shares entries"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class TranslationMemory:
+    def __init__(self, db_path: Optional[str] = None, lru_size: int = 10000):
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[Key, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translations (
+                    text TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    translated TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (text, source, target, provider)
+                )
+                """
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(text: str, source: str, target: str, provider: str) -> Key:
+        return (normalize_text(text), source, target, provider)
+
+    def get_many(self, keys: Iterable[Key]) -> Dict[Key, str]:
+        """Cached translations for the given keys (LRU first, then SQLite)"""
+        found: Dict[Key, str] = {}
+        missing: List[Key] = []
+        with self._lock:
+            for key in keys:
+                value = self._lru.get(key)
+                if value is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = value
+                else:
+                    missing.append(key)
+
+            if missing and self._conn is not None:
+                for key in missing:
+                    row = self._conn.execute(
+                        "SELECT translated FROM translations "
+                        "WHERE text = ? AND source = ? AND target = ? AND provider = ?",
+                        key,
+                    ).fetchone()
+                    if row is not None:
+                        found[key] = row[0]
+                        self._put_lru(key, row[0])
+        return found
+
+    def put_many(self, entries: Dict[Key, str]):
+        if not entries:
+            return
+        with self._lock:
+            for key, value in entries.items():
+                self._put_lru(key, value)
+            if self._conn is not None:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO translations (text, source, target, provider, translated, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*key, value, now) for key, value in entries.items()],
+                )
+                self._conn.commit()
+
+    def _put_lru(self, key: Key, value: str):
+        """Insert into LRU and evict the oldest entries over size (caller holds lock)"""
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+
+# Singleton instance
+_translation_memory = None
+
+
+def get_translation_memory() -> TranslationMemory:
+    global _translation_memory
+    if _translation_memory is None:
+        db_path = os.getenv(
+            "TRANSLATION_MEMORY_PATH",
+            str(Path(__file__).parent / "cache" / "translation_memory.sqlite3"),
+        )
+        _translation_memory = TranslationMemory(
+            db_path or None,
+            lru_size=int(os.getenv("TRANSLATION_MEMORY_LRU_SIZE", "10000")),
+        )
+        logger.info(f"Translation memory ready (store: {db_path or 'memory only'})")
+    return _translation_memory
@@ -0,0 +1,271 @@
+"""
+Pipeline Worker Pool
+Runs CPU-bound pipeline work (detection, inpainting, OCR, encoding) off the event loop.
+
+OCR_WORKERS=0  -> background threads in this process (models shared with the API)
+OCR_WORKERS=N  -> N worker processes; each one preloads YOLOv8 + manga-ocr once at start
+
+Chapter jobs run in their own lane so a long chapter never blocks single-page jobs:
+- thread mode: page jobs and chapter jobs each get their own thread(s); both lanes share this
+  process's models, whose forward passes are serialized by locks in the detector and OCR services
+- process mode: at most OCR_CHAPTER_WORKERS chapters at once, and never all N processes (N >= 2)
+
+Worker readiness reports, job progress and partial results flow back from worker processes through one
+multiprocessing queue; a listener thread records them and dispatches per-job callbacks.
+
+If a worker process dies (e.g. out of memory on a very tall strip) the process pool is broken for good:
+the jobs it was running fail, and the pool is replaced by a fresh one (readiness resets until the new
+workers have preloaded) so later jobs run normally.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Set inside worker processes by _init_worker
+_worker_event_queue = None
+
+
+def _init_worker(event_queue, preload: bool, threads_per_worker: int):
+    """Worker process initializer: wire the event queue and load models once"""
+    global _worker_event_queue
+    _worker_event_queue = event_queue
+
+    logging.basicConfig(level=logging.INFO)
+
+    if threads_per_worker > 0:
+        import cv2
+        cv2.setNumThreads(threads_per_worker)
+        try:
+            import torch
+            torch.set_num_threads(threads_per_worker)
+        except ImportError:
+            pass
+
+    state = {}
+    if preload:
+        # Load + dummy forward pass so the first job in this worker is warm
+        from app.services.model_warmup import warmup_models
+        state = warmup_models()
+        logger.info(f"[Worker {os.getpid()}] Models preloaded")
+
+    event_queue.put(("worker_ready", os.getpid(), state))
+
+
+def _run_task(fn: Callable, token: Optional[str], args: tuple):
+    """Executed in the worker: call fn with progress/event callbacks routed back to the API process"""
+    progress_callback = None
+    event_callback = None
+
+    if token is not None and _worker_event_queue is not None:
+        def progress_callback(pct: int, msg: str):
+            _worker_event_queue.put(("progress", token, (pct, msg)))
+
+        def event_callback(event: str, data: dict):
+            _worker_event_queue.put(("event", token, (event, data)))
+
+    try:
+        return fn(*args, progress_callback=progress_callback, event_callback=event_callback)
+    finally:
+        if token is not None and _worker_event_queue is not None:
+            # Marks the end of this task's events (the queue is FIFO per worker)
+            _worker_event_queue.put(("done", token, None))
+
+
+LANES = ("page", "chapter")
+
+
+class PipelineWorkerPool:
+    def __init__(self, workers: int = 0, preload: bool = True, threads_per_worker: int = 0, chapter_workers: int = 1):
+        self.workers = workers
+        self.chapter_workers = max(1, chapter_workers)
+        self.preload = preload
+        self.threads_per_worker = threads_per_worker
+        self._executor_lock = threading.Lock()
+        # token -> (on_progress, on_event, drained) for jobs running in worker processes
+        self._callbacks: Dict[str, Tuple[Optional[Callable], Optional[Callable], Callable]] = {}
+        self._callbacks_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._event_queue = None
+        # pid -> model state reported by each worker after preloading
+        self.worker_state: Dict[int, dict] = {}
+
+        if workers > 0:
+            self._mp_context = multiprocessing.get_context("spawn")  # fork is unsafe once torch is loaded
+            self._event_queue = self._mp_context.Queue()
+            self._executor: Executor = self._new_process_executor()
+            self._listener = threading.Thread(target=self._listen, name="pipeline-events", daemon=True)
+            self._listener.start()
+            # Leave at least one process to page jobs when there is more than one
+            self._chapter_slots = asyncio.Semaphore(max(1, min(self.chapter_workers, workers - 1)))
+            # Both lanes submit to self._executor, which is replaced if the pool breaks
+            self._lane_executors: Dict[str, Executor] = {}
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+            self._chapter_slots = None
+            self._lane_executors = {
+                "page": self._executor,
+                "chapter": ThreadPoolExecutor(max_workers=self.chapter_workers, thread_name_prefix="pipeline-chapter"),
+            }
+
+    def _new_process_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._mp_context,
+            initializer=_init_worker,
+            initargs=(self._event_queue, self.preload, self.threads_per_worker),
+        )
+
+    def _replace_broken_executor(self, broken: Executor):
+        """Swap a broken process pool for a fresh one (once, however many jobs saw it break)"""
+        with self._executor_lock:
+            if self._executor is not broken:
+                return
+            logger.error("Pipeline worker process died; restarting the worker pool")
+            self._executor = self._new_process_executor()
+            # Old workers are gone: not ready until the new ones report in
+            self.worker_state.clear()
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start_async()
+
+    @property
+    def mode(self) -> str:
+        return f"process x{self.workers}" if self.workers > 0 else f"thread (+{self.chapter_workers} chapter)"
+
+    def start(self):
+        """Spawn worker processes now (and let them preload models) instead of on first job"""
+        if self.workers > 0:
+            for future in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+
+    def start_async(self):
+        """Like start(), without blocking the caller (workers warm up in the background)"""
+        if self.workers > 0:
+            for _ in range(self.workers):
+                self._executor.submit(os.getpid)
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        on_progress: Optional[Callable[[int, str], None]] = None,
+        on_event: Optional[Callable[[str, dict], None]] = None,
+        lane: str = "page"
+    ):
+        """
+        Run fn(*args, progress_callback=..., event_callback=...) in the pool and await its result.
+        fn and its arguments/result must be picklable in process mode.
+        lane: "page" for single-page jobs, "chapter" for chapter jobs (separate capacity, see module doc).
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown worker lane '{lane}'")
+        loop = asyncio.get_running_loop()
+
+        if self.workers == 0:
+            # Same process: call the callbacks directly from the worker thread
+            return await loop.run_in_executor(
+                self._lane_executors[lane],
+                lambda: fn(*args, progress_callback=on_progress, event_callback=on_event)
+            )
+
+        if lane == "chapter":
+            async with self._chapter_slots:
+                return await self._run_in_process(loop, fn, args, on_progress, on_event)
+        return await self._run_in_process(loop, fn, args, on_progress, on_event)
+
+    async def _run_in_process(self, loop, fn: Callable, args: tuple, on_progress, on_event):
+        """Submit to a worker process; callbacks arrive through the event queue listener"""
+        token = None
+        drained = loop.create_future()
+        if on_progress is not None or on_event is not None:
+            token = uuid.uuid4().hex
+            def mark_drained():
+                loop.call_soon_threadsafe(lambda: drained.done() or drained.set_result(None))
+            with self._callbacks_lock:
+                self._callbacks[token] = (on_progress, on_event, mark_drained)
+
+        executor = self._executor
+        try:
+            try:
+                result = await loop.run_in_executor(executor, _run_task, fn, token, args)
+            except BrokenProcessPool:
+                # Fails the jobs that were running in the dead pool; later jobs get a fresh one
+                self._replace_broken_executor(executor)
+                raise
+            if token is not None:
+                # Deliver every progress/event callback before the caller sees the result
+                try:
+                    await asyncio.wait_for(drained, timeout=10)
+                except asyncio.TimeoutError:
+                    logger.warning("Timed out waiting for worker events")
+            return result
+        finally:
+            if token is not None:
+                with self._callbacks_lock:
+                    self._callbacks.pop(token, None)
+
+    def _listen(self):
+        """Record worker readiness and dispatch progress/partial-result events from worker processes"""
+        while True:
+            item = self._event_queue.get()
+            if item is None:
+                break
+            kind, token, payload = item
+            if kind == "worker_ready":
+                self.worker_state[token] = payload
+                continue
+            with self._callbacks_lock:
+                on_progress, on_event, mark_drained = self._callbacks.get(token, (None, None, None))
+            if kind == "done":
+                if mark_drained is not None:
+                    mark_drained()
+                continue
+            callback = on_progress if kind == "progress" else on_event
+            if callback is None:
+                continue
+            try:
+                callback(*payload)
+            except Exception as e:
+                logger.warning(f"{kind} callback failed: {e}")
+
+    def workers_ready(self) -> bool:
+        """All worker processes started and finished preloading (always True in thread mode)"""
+        return self.workers == 0 or len(self.worker_state) >= self.workers
+
+    def shutdown(self):
+        for executor in {self._executor, *self._lane_executors.values()}:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self._event_queue is not None:
+            self._event_queue.put(None)
+
+
+# Singleton instance
+_worker_pool = None
+
+
+def get_worker_pool() -> PipelineWorkerPool:
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = PipelineWorkerPool(
+            workers=int(os.getenv("OCR_WORKERS", "0")),
+            preload=os.getenv("OCR_WORKER_PRELOAD", "true").lower() == "true",
+            threads_per_worker=int(os.getenv("OCR_WORKER_THREADS", "0")),
+            chapter_workers=int(os.getenv("OCR_CHAPTER_WORKERS", "1")),
+        )
+        logger.info(f"Pipeline worker pool: {_worker_pool.mode}")
+    return _worker_pool
+
+
+def shutdown_worker_pool():
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.shutdown()
+        _worker_pool = None
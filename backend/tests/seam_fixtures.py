@@ -0,0 +1,62 @@
+"""
+Synthetic ground truth for slicing regressions, shared by the tests and benchmark.py:
+bubbles stacked down a tall page, a stand-in detector that sees each slice the way a real one
+would, and recall of detected boxes against the ground truth.
+"""
+
+import numpy as np
+
+
+def seam_bubbles(seed: int, height: int, width: int = 800) -> list:
+    """Ground-truth bubbles stacked down the page (no two overlap), some taller than the seam overlap"""
+    rng = np.random.default_rng(seed)
+    boxes = []
+    y = int(rng.integers(20, 200))
+    while True:
+        bw, bh = int(rng.integers(120, 300)), int(rng.integers(100, 650))
+        if y + bh >= height:
+            return boxes
+        boxes.append((int(rng.integers(0, width - bw)), y, bw, bh))
+        y += bh + int(rng.integers(30, 250))
+
+
+class SliceOracle:
+    """
+    Stand-in detector: reports the part of each ground-truth bubble visible in a slice, and misses
+    slivers showing less than min_visible of the bubble (like a real detector on a cut bubble)
+    """
+
+    def __init__(self, page, bubbles, min_visible: float = 0.3):
+        self.page = page
+        self.bubbles = bubbles
+        self.min_visible = min_visible
+        self.rows = 0
+
+    def detect(self, img_slices):
+        base = self.page.__array_interface__["data"][0]
+        results = []
+        for img_slice in img_slices:
+            y = (img_slice.__array_interface__["data"][0] - base) // self.page.strides[0]
+            h = img_slice.shape[0]
+            self.rows += h
+            boxes = []
+            for bx, by, bw, bh in self.bubbles:
+                top, bottom = max(by, y), min(by + bh, y + h)
+                if bottom - top >= self.min_visible * bh:
+                    boxes.append((bx, top - y, bw, bottom - top))
+            results.append(boxes)
+        return results
+
+
+def box_recall(reference, boxes, iou: float = 0.5) -> float:
+    """Share of reference boxes matched by some box at IoU >= iou"""
+    def overlap(a, b):
+        ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+        iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+        inter = ix * iy
+        union = a[2] * a[3] + b[2] * b[3] - inter
+        return inter / union if union else 0.0
+
+    if not reference:
+        return 1.0
+    return sum(1 for r in reference if any(overlap(r, b) >= iou for b in boxes)) / len(reference)
@@ -19,6 +19,22 @@ import {
     withRetry
 } from './apiClient'
 
+// ============ Job Streaming ============
+
+export type JobStreamEvent = 'slice_regions' | 'regions' | 'ocr'
+
+class JobFailedError extends Error {}
+
+// Cleaned image fields come back snake_case from the backend; OcrResponse uses camelCase
+function toOcrResponse(result: any): OcrResponse {
+    const { cleaned_image, cleaned_image_url, ...rest } = result
+    return {
+        ...rest,
+        cleanedImage: rest.cleanedImage ?? cleaned_image ?? null,
+        cleanedImageUrl: cleaned_image_url ? `http://localhost:8000${cleaned_image_url}` : null,
+    }
+}
+
 // ============ Translator API Class ============
 
 class TranslatorApi {
@@ -125,17 +141,87 @@ class TranslatorApi {
             throw new Error(`Failed to get job status: ${response.statusText}`)
         }
 
-        return response.json()
+        const data = await response.json()
+        return data.result ? { ...data, result: toOcrResponse(data.result) } : data
+    }
+
+    /**
+     * Subscribe to a job's Server-Sent Events stream (progress + partial results).
+     * Returns a function that closes the stream.
+     */
+    streamJobEvents(
+        jobId: string,
+        handlers: {
+            onProgress?: (progress: number, message: string) => void
+            onPartial?: (event: JobStreamEvent, data: any) => void
+            onCompleted?: () => void
+            onFailed?: (error: string) => void
+            onError?: () => void
+        }
+    ): () => void {
+        // Hardcode URL (same backend as startOcrJob)
+        const source = new EventSource(`http://localhost:8000/api/ocr/events/${jobId}`)
+        let finished = false
+        const close = () => {
+            finished = true
+            source.close()
+        }
+
+        source.addEventListener('progress', (e) => {
+            const data = JSON.parse((e as MessageEvent).data)
+            handlers.onProgress?.(data.progress, data.message)
+        })
+        for (const name of ['slice_regions', 'regions', 'ocr'] as JobStreamEvent[]) {
+            source.addEventListener(name, (e) => {
+                handlers.onPartial?.(name, JSON.parse((e as MessageEvent).data))
+            })
+        }
+        source.addEventListener('completed', () => {
+            close()
+            handlers.onCompleted?.()
+        })
+        source.addEventListener('failed', (e) => {
+            close()
+            const data = JSON.parse((e as MessageEvent).data)
+            handlers.onFailed?.(data.error || 'Job failed')
+        })
+        source.onerror = () => {
+            if (finished) return
+            close()
+            handlers.onError?.()
+        }
+
+        return close
     }
 
     /**
-     * Poll until job completes, calling onProgress callback with updates
+     * Wait until job completes, calling onProgress callback with updates.
+     * Uses the event stream when available and falls back to polling.
      */
     async pollUntilComplete(
         jobId: string,
         onProgress: (progress: number, message: string) => void,
-        intervalMs: number = 500
+        intervalMs: number = 500,
+        onPartial?: (event: JobStreamEvent, data: any) => void
     ): Promise<JobStatusResponse> {
+        if (typeof EventSource !== 'undefined') {
+            try {
+                return await new Promise<JobStatusResponse>((resolve, reject) => {
+                    this.streamJobEvents(jobId, {
+                        onProgress,
+                        onPartial,
+                        // Fetch the final job status once
+                        onCompleted: () => this.getJobStatus(jobId).then(resolve, reject),
+                        onFailed: (error) => reject(new JobFailedError(error)),
+                        onError: () => reject(new Error('Event stream unavailable')),
+                    })
+                })
+            } catch (error) {
+                if (error instanceof JobFailedError) throw error
+                console.warn('⚠️ [SDK] Event stream failed, falling back to polling')
+            }
+        }
+
         return new Promise((resolve, reject) => {
             const poll = async () => {
                 try {
@@ -29,6 +29,7 @@ export interface OcrResponse {
     confidence: number
     processingTime: number
     cleanedImage?: string | null // Base64 of cleaned image
+    cleanedImageUrl?: string | null // Binary endpoint for the cleaned image (/api/ocr/images/...)
     jobId?: string
     message?: string
 }